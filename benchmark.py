@@ -0,0 +1,88 @@
+"""Headless frame-time benchmark for Echoing Depths.
+
+Plays every level with seeded random input under the SDL dummy drivers and
+reports time to first frame, per-phase timings and p50/p99 frame times, so
+regressions show up as numbers instead of feel:
+
+    python benchmark.py --frames 600 --seed 1 --json bench.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from main import EchoingDepthsGame, FrameProfiler, MazeGenerator, RandomInput, use_headless_drivers
+
+PHASES = ['first_frame', 'generation', 'setup_level', 'events', 'movement', 'particles', 'lighting', 'compositing', 'hud', 'overlay']
+
+def benchmark_level(level, frames, seed):
+    """Run one level headless through EchoingDepthsGame.play and return its raw timings in seconds"""
+    profiler = FrameProfiler(enabled=True, history=frames)
+    game = EchoingDepthsGame(starting_level=level, seed=seed, input_source=RandomInput(seed), headless=True,
+                             max_frames=frames, profiler=profiler)
+    timings = {phase: [] for phase in PHASES}
+    
+    # Per-frame phases come from the game's own profiler; the first level also pays for display and asset setup
+    game.play()
+    timings['first_frame'].append(game.time_to_first_frame)
+    for frame in profiler.frames:
+        for phase in PHASES[3:]:
+            timings[phase].append(frame['phases'].get(phase, 0))
+    frame_times = [frame['total'] for frame in profiler.frames]
+    
+    # Level construction, measured on its own once a background build still running from play() has finished
+    game.preloader.shutdown(wait=True)
+    maze_width, maze_height = game.maze_dimensions(level)
+    start = time.perf_counter()
+    MazeGenerator.generate_grid(maze_width, maze_height, complexity=level - 1, seed=game.level_seed(level))
+    timings['generation'].append(time.perf_counter() - start)
+    start = time.perf_counter()
+    game.build_level(level)
+    timings['setup_level'].append(time.perf_counter() - start)
+    
+    return timings, frame_times
+
+def summarize(timings, frame_times):
+    """Mean milliseconds per phase plus frame-time percentiles"""
+    summary = {phase: round(float(np.mean(values)) * 1000, 3) if values else None for phase, values in timings.items()}
+    summary['frames'] = len(frame_times)
+    summary['p50'] = round(float(np.percentile(frame_times, 50)) * 1000, 3) if frame_times else None
+    summary['p99'] = round(float(np.percentile(frame_times, 99)) * 1000, 3) if frame_times else None
+    return summary
+
+def run_benchmark(frames=600, seed=0, levels=range(1, 6)):
+    """Benchmark each level and the combined frame-time distribution"""
+    use_headless_drivers()
+    results = {}
+    all_frame_times = []
+    for level in levels:
+        timings, frame_times = benchmark_level(level, frames, seed)
+        results[f'level_{level}'] = summarize(timings, frame_times)
+        all_frame_times.extend(frame_times)
+    results['all_levels'] = summarize({}, all_frame_times)
+    return results
+
+def print_report(results):
+    """Print one row per level with phase means and frame-time percentiles, in ms"""
+    columns = PHASES + ['p50', 'p99', 'frames']
+    print(f"{'':>12}" + ''.join(f'{column:>13}' for column in columns))
+    for name, summary in results.items():
+        cells = ''.join(f'{summary[column]:>13}' if summary.get(column) is not None else f"{'-':>13}" for column in columns)
+        print(f'{name:>12}' + cells)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=600, help='frames to play per level')
+    parser.add_argument('--seed', type=int, default=0, help='seed for mazes, particles and input')
+    parser.add_argument('--json', help='also write the results to this JSON file')
+    args = parser.parse_args()
+    
+    results = run_benchmark(args.frames, args.seed)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
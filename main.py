@@ -3,8 +3,20 @@ import numpy as np
 import math
 import random
 import pygame.mixer
+import argparse
 import os
 import time
+import csv
+import json
+import mmap
+import struct
+import hashlib
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
 
 # Screen and Game Constants
 SCREEN_WIDTH = 800
@@ -14,13 +26,86 @@ GRID_SIZE = 40
 MOVEMENT_SPEED = 3
 FPS = 60
 
+# Timing Constants
+SIMULATION_STEP = 1 / FPS  # Fixed length of one simulation step, in seconds
+RENDER_FPS = FPS  # Render rate cap; 0 renders as fast as the machine allows
+MAX_CATCH_UP_STEPS = 5  # Simulation steps run at most per rendered frame; older backlog is dropped
+
 # Color Constants
 WALL_COLOR = (50, 50, 50)
 PLAYER_COLOR = (200, 200, 255)  # Soft bluish white
 EXIT_COLOR = (50, 255, 50)  # Vibrant green
 BACKGROUND_COLOR = (10, 10, 20)  # Deep dark blue-black
+GRADIENT_TOP_COLOR = (10, 10, 20)  # Background gradient at the top of the screen
+GRADIENT_BOTTOM_COLOR = (10, 10, 219)  # Background gradient at the bottom of the screen
+GRADIENT_CACHE_SIZE = 16  # Gradient surfaces kept before the least recently used is dropped
 DARK_OVERLAY_COLOR = (0, 0, 0, 220)
 
+# Wall Texture Constants
+WALL_TEXTURE_VARIANTS = 16  # Distinct wall textures per level, shared by every wall
+WALL_NOISE_DOTS = 50  # Shaded noise pixels per texture
+
+# World Streaming Constants
+CHUNK_CELLS = 8  # Chunk edge in grid cells; level graphics are rendered one chunk at a time
+CHUNK_CACHE_SIZE = 48  # Rendered chunks kept before the least recently seen is evicted
+
+# Lighting Constants
+LIGHT_FLICKER_STEPS = 8  # Distinct flicker radii pre-rendered per darkness level
+LIGHT_FLICKER_RATE = 6  # Flicker phase advance per second, independent of the render rate
+LIGHT_CACHE_SIZE = 32  # Maximum number of light sprites kept in memory
+
+# Visibility Constants
+VISIBILITY_SUBCELLS = 8  # Player positions per cell edge that share one visibility polygon
+VISIBILITY_RING_RAYS = 64  # Extra rays spread around the circle so the open light stays round
+
+# Asset Constants
+PLAY_IMAGE = os.path.join('assets', 'play.png')
+ASSET_LOADER_THREADS = 2  # Background threads decoding images and sounds
+
+# Audio Constants
+GUIDANCE_SOUND = 'spook.wav'  # Looping buzz that gets louder near the exit
+AUDIO_VOLUME_THRESHOLD = 0.02  # Smallest per-ear volume change sent to the mixer
+AUDIO_MAX_PAN = 0.6  # How far the buzz leans towards the next waypoint's side
+GUIDANCE_PROCESS_CELLS = 250000  # Mazes with more cells get their path distances from a worker process
+
+# Particle Constants
+PARTICLE_CAPACITY = 512  # Fixed size of the particle pool; the oldest particles are reused first
+PARTICLE_COLOR = (200, 200, 255)
+
+# Maze Constants
+MAZE_FLOOR = 0
+MAZE_WALL = 1
+MAZE_LOOP_CHANCE = 0.1  # Chance of an extra opening that creates a loop, at complexity 0
+MAZE_BRAID_CHANCE = 0.6  # Chance of opening a dead end into a neighbour, at complexity 0
+
+# Text Constants
+TEXT_CACHE_SIZE = 64  # Rendered strings kept per font before the least recently used is dropped
+TIMER_GLYPHS = '0123456789.:-'
+
+# Dirty-Rect Constants
+HUD_RECT = pygame.Rect(0, 0, 300, 100)  # Area repainted for the HUD every frame
+PROFILER_OVERLAY_RECT = pygame.Rect(SCREEN_WIDTH - 230, 0, 230, 240)
+
+# Profiling Constants
+PROFILER_HISTORY = 240  # Recent frames kept in the profiler ring buffer
+PROFILER_TOGGLE_KEY = pygame.K_F3  # Shows the performance overlay and starts profiling
+PROFILER_FONT_SIZE = 22
+PROFILER_GLYPHS = '0123456789./'  # Overlay numbers are drawn from a glyph atlas, labels from the text cache
+
+# Level Pack Constants
+LEVEL_PACK_PATH = os.path.join('maze_levels', 'levels.pack')  # Used by the game when present
+LEVEL_PACK_MAGIC = b'EDLP'
+LEVEL_PACK_VERSION = 1
+SEED_CATALOGUE_PATH = os.path.join('maze_levels', 'seed_catalogue.json')  # Validated seeds, used when present
+LEVEL_ENCODING_UINT8 = 0  # One byte per grid cell
+LEVEL_ENCODING_BITS = 1  # One bit per grid cell, row-major
+
+# Replay Constants
+INPUT_LOG_MAGIC = b'EDIR'
+INPUT_LOG_VERSION = 2
+# Keys recorded each simulation step, one bit each in this order
+INPUT_LOG_KEYS = (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT, pygame.K_w, pygame.K_s, pygame.K_a, pygame.K_d)
+
 # Game States
 STATE_LOADING = 0
 STATE_PLAYING = 1
@@ -28,269 +113,1747 @@ STATE_GAME_OVER = 2
 
 class MazeGenerator:
     @staticmethod
-    def generate_maze(width, height, complexity=0):
-        """Generate a maze with optional complexity parameter and more organic feel"""
-        maze = [['#' for _ in range(width)] for _ in range(height)]
+    def tuning(complexity):
+        """Map a complexity level onto Eller's join, descent, loop and braid probabilities"""
+        complexity = max(0, complexity)
+        join_chance = 0.5  # Chance of opening the wall between two neighbouring cells of different sets
+        down_chance = 0.3  # Chance of a cell descending beyond the one descent each set needs
+        loop_chance = MAZE_LOOP_CHANCE / (1 + complexity)  # Openings inside a set add loops
+        braid_chance = max(0.0, MAZE_BRAID_CHANCE - 0.15 * complexity)  # Dead ends opened into a neighbour
+        return join_chance, down_chance, loop_chance, braid_chance
+
+    @staticmethod
+    def iter_rows(width, height, complexity=0, seed=None):
+        """Stream the maze grid one uint8 row at a time using Eller's algorithm, in O(width) memory"""
+        # Checked here rather than in the generator so bad sizes fail on the call, not on the first row
+        if width < 3 or height < 3:
+            raise ValueError(f"maze width and height must be at least 3, got {width}x{height}")
+        return MazeGenerator.eller_rows(width, height, complexity, seed)
+
+    @staticmethod
+    def eller_rows(width, height, complexity, seed):
+        """The generator behind iter_rows, for sizes of at least one passage cell"""
+        rng = np.random.default_rng(seed)
+        join_chance, down_chance, loop_chance, braid_chance = MazeGenerator.tuning(complexity)
+        cells = (width - 1) // 2  # Passage cells per row; they sit on odd grid coordinates
+        cell_rows = (height - 1) // 2
+        cell_columns = np.arange(cells) * 2 + 1
         
-        def in_bounds(x, y):
-            return 0 <= x < width and 0 <= y < height
+        wall_row = np.full(width, MAZE_WALL, dtype=np.uint8)
+        yield wall_row.copy()
         
-        def carve_passages(x, y):
-            directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-            random.shuffle(directions)
+        sets = np.arange(cells)
+        up = np.zeros(cells, dtype=bool)  # Cells opened from the row above
+        for cell_row in range(cell_rows):
+            last_row = cell_row == cell_rows - 1
+            # Relabel the sets inherited from above to 0..k-1 so union-find can use a flat list
+            labels, sets = np.unique(sets, return_inverse=True)
+            parent = list(range(len(labels)))
+            set_list = sets.tolist()
+            joins = (rng.random(cells - 1) < join_chance).tolist()
+            loops = (rng.random(cells - 1) < loop_chance).tolist()
+            east = [False] * max(0, cells - 1)  # Whether the wall east of each cell is open
+            
+            def find(label):
+                while parent[label] != label:
+                    parent[label] = parent[parent[label]]
+                    label = parent[label]
+                return label
+            
+            # Join neighbouring cells; the last row must join every remaining set
+            for i in range(cells - 1):
+                a = find(set_list[i])
+                b = find(set_list[i + 1])
+                if a != b:
+                    if last_row or joins[i]:
+                        parent[b] = a
+                        east[i] = True
+                elif loops[i]:
+                    east[i] = True
+            sets = np.array([find(label) for label in range(len(parent))])[sets]
+            
+            # Every set descends at least once, through a randomly chosen member
+            down = np.zeros(cells, dtype=bool)
+            if not last_row:
+                down = rng.random(cells) < down_chance
+                order = np.lexsort((rng.random(cells), sets))
+                group_ends = np.append(np.flatnonzero(np.diff(sets[order])), cells - 1)
+                down[order[group_ends]] = True
+            
+            # Braid: open some dead ends into a horizontal neighbour, merging sets if needed
+            open_east = np.array(east + [False], dtype=bool)
+            open_west = np.array([False] + east, dtype=bool)
+            degree = up.astype(int) + down + open_east + open_west
+            braid = (degree == 1) & (rng.random(cells) < braid_chance)
+            for i in np.flatnonzero(braid).tolist():
+                if i < cells - 1 and not east[i]:
+                    neighbour, wall = i + 1, i
+                elif i > 0 and not east[i - 1]:
+                    neighbour, wall = i - 1, i - 1
+                else:
+                    continue
+                east[wall] = True
+                a = find(int(sets[i]))
+                b = find(int(sets[neighbour]))
+                parent[b] = a
+            sets = np.array([find(label) for label in range(len(parent))])[sets]
+            
+            row = wall_row.copy()
+            row[cell_columns] = MAZE_FLOOR
+            row[cell_columns[:-1][np.array(east, dtype=bool)] + 1] = MAZE_FLOOR
+            yield row
+            
+            if last_row:
+                break
             
-            for dx, dy in directions:
-                nx, ny = x + dx*2, y + dy*2
-                if in_bounds(nx, ny) and maze[ny][nx] == '#':
-                    # Add some randomness to path creation
-                    if random.random() > 0.1:  # 90% chance of carving
-                        maze[y+dy][x+dx] = ' '
-                        maze[ny][nx] = ' '
-                        carve_passages(nx, ny)
+            below = wall_row.copy()
+            below[cell_columns[down]] = MAZE_FLOOR
+            yield below
+            
+            # Cells that did not descend start the next row in fresh sets
+            fresh = np.flatnonzero(~down)
+            sets[fresh] = sets.max() + 1 + np.arange(len(fresh))
+            up = down
+        
+        # Close the bottom edge, padding out even heights with solid wall
+        for _ in range(height - cell_rows * 2):
+            yield wall_row.copy()
+
+    @staticmethod
+    def generate_grid(width, height, complexity=0, seed=None):
+        """Generate the maze as a (height, width) uint8 grid of MAZE_WALL / MAZE_FLOOR"""
+        return np.vstack(list(MazeGenerator.iter_rows(width, height, complexity, seed)))
+
+    @staticmethod
+    def level_dimensions(level):
+        """Maze size in grid cells for a level"""
+        return 20 + (level * 2), 15 + level
+
+    @staticmethod
+    def endpoints(width, height):
+        """Return the (column, row) grid cells of the player start and the exit"""
+        return (1, 1), (((width - 1) // 2) * 2 - 1, ((height - 1) // 2) * 2 - 1)
+
+class LevelPack:
+    HEADER = struct.Struct('<4sHH')  # Magic, version, level count
+    INDEX_ENTRY = struct.Struct('<HQ')  # Level number, offset of its record
+    RECORD = struct.Struct('<IIIIIIqB')  # Width, height, start col/row, exit col/row, seed (-1 for none), encoding
+
+    def __init__(self, path):
+        """Memory-mapped level pack; a level's grid is only read when that level is loaded"""
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        magic, version, count = self.HEADER.unpack_from(self.data, 0)
+        if magic != LEVEL_PACK_MAGIC or version != LEVEL_PACK_VERSION:
+            raise ValueError(f"{path} is not a version {LEVEL_PACK_VERSION} level pack")
+        self.offsets = dict(
+            self.INDEX_ENTRY.unpack_from(self.data, self.HEADER.size + index * self.INDEX_ENTRY.size)
+            for index in range(count)
+        )
+
+    @classmethod
+    def open_default(cls, path=LEVEL_PACK_PATH):
+        """Open the pack if it exists, else return None"""
+        return cls(path) if os.path.exists(path) else None
+
+    def __contains__(self, level):
+        return level in self.offsets
+
+    def levels(self):
+        return sorted(self.offsets)
+
+    def load(self, level):
+        """Return (grid, start, exit, seed) for a level; uint8 grids are zero-copy views of the file"""
+        offset = self.offsets[level]
+        width, height, start_col, start_row, exit_col, exit_row, seed, encoding = self.RECORD.unpack_from(self.data, offset)
+        offset += self.RECORD.size
+        
+        if encoding == LEVEL_ENCODING_BITS:
+            packed = np.frombuffer(self.data, dtype=np.uint8, count=(width * height + 7) // 8, offset=offset)
+            grid = np.unpackbits(packed, count=width * height)
+        else:
+            grid = np.frombuffer(self.data, dtype=np.uint8, count=width * height, offset=offset)
+        
+        return grid.reshape(height, width), (start_col, start_row), (exit_col, exit_row), None if seed < 0 else seed
+
+    @classmethod
+    def write(cls, path, levels, encoding=LEVEL_ENCODING_BITS):
+        """Write levels given as (level, grid, start, exit, seed) tuples, with (column, row) cells"""
+        records = []
+        for level, grid, start, exit_cell, seed in levels:
+            grid = np.asarray(grid, dtype=np.uint8)
+            height, width = grid.shape
+            if encoding == LEVEL_ENCODING_BITS:
+                payload = np.packbits(grid.ravel()).tobytes()
+            else:
+                payload = grid.tobytes()
+            header = cls.RECORD.pack(width, height, *start, *exit_cell, -1 if seed is None else seed, encoding)
+            records.append((level, header + payload))
+        
+        offset = cls.HEADER.size + cls.INDEX_ENTRY.size * len(records)
+        with open(path, 'wb') as f:
+            f.write(cls.HEADER.pack(LEVEL_PACK_MAGIC, LEVEL_PACK_VERSION, len(records)))
+            for level, record in records:
+                f.write(cls.INDEX_ENTRY.pack(level, offset))
+                offset += len(record)
+            for level, record in records:
+                f.write(record)
+
+class SeedCatalogue:
+    def __init__(self, levels):
+        """Maze seeds checked offline by validate_mazes.py, keyed by level"""
+        self.levels = levels
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        return cls({int(level): entry for level, entry in data['levels'].items()})
+
+    @classmethod
+    def open_default(cls, path=SEED_CATALOGUE_PATH):
+        """Load the catalogue if it exists, else return None"""
+        return cls.load(path) if os.path.exists(path) else None
+
+    def seeds(self, level, dimensions):
+        """Validated seeds for a level, or an empty list if none were checked at these dimensions"""
+        entry = self.levels.get(level)
+        if entry is None or (entry['width'], entry['height']) != tuple(dimensions):
+            return []
+        return [stats['seed'] for stats in entry['seeds']]
+
+    def pick(self, level, dimensions, game_seed=None):
+        """Choose a validated seed, reproducibly for a seeded game; None if the level has none"""
+        seeds = self.seeds(level, dimensions)
+        if not seeds:
+            return None
+        if game_seed is None:
+            return random.choice(seeds)
+        return seeds[(game_seed + level) % len(seeds)]
+
+    @staticmethod
+    def write(path, levels):
+        """Save per-level entries of width, height, complexity and a list of seed stats"""
+        with open(path, 'w') as f:
+            json.dump({'levels': {str(level): entry for level, entry in sorted(levels.items())}}, f, indent=1)
+
+class WallGrid:
+    def __init__(self, cells, cell_size=GRID_SIZE):
+        """Boolean wall occupancy of a maze, indexed [row, column]"""
+        self.cells = cells
+        self.cell_size = cell_size
+        self.rows, self.cols = cells.shape
+
+    def is_wall_cell(self, col, row):
+        """Check a single cell; anything outside the maze counts as wall"""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return bool(self.cells[row, col])
+        return True
+
+    def is_wall_at(self, x, y):
+        """Check the cell under a point in pixel coordinates"""
+        return self.is_wall_cell(int(x // self.cell_size), int(y // self.cell_size))
+
+    def segment_hits_wall(self, start, end):
+        """Walk the cells crossed by a pixel segment and report whether any of them is a wall"""
+        x0, y0 = start[0] / self.cell_size, start[1] / self.cell_size
+        x1, y1 = end[0] / self.cell_size, end[1] / self.cell_size
+        col, row = math.floor(x0), math.floor(y0)
+        end_col, end_row = math.floor(x1), math.floor(y1)
+        dx, dy = x1 - x0, y1 - y0
+        
+        step_col = 1 if dx > 0 else -1
+        step_row = 1 if dy > 0 else -1
+        # Distance along the segment between vertical / horizontal cell boundaries, and to the first one
+        delta_x = abs(1 / dx) if dx else math.inf
+        delta_y = abs(1 / dy) if dy else math.inf
+        next_x = ((col + 1 - x0) if dx > 0 else (x0 - col)) * delta_x if dx else math.inf
+        next_y = ((row + 1 - y0) if dy > 0 else (y0 - row)) * delta_y if dy else math.inf
+        
+        for _ in range(abs(end_col - col) + abs(end_row - row) + 1):
+            if self.is_wall_cell(col, row):
+                return True
+            if next_x < next_y:
+                next_x += delta_x
+                col += step_col
+            else:
+                next_y += delta_y
+                row += step_row
+        return False
+
+class GuidanceField:
+    NEIGHBOURS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+    process_pool = None  # Shared worker process for large mazes, started on first use
+
+    def __init__(self, walls, target, cell_size=GRID_SIZE):
+        """Breadth-first path distance, in cells, from every open cell to a target (column, row)"""
+        self.cell_size = cell_size
+        self.rows, self.cols = walls.shape
+        
+        self.distances = None
+        if walls.size > GUIDANCE_PROCESS_CELLS:
+            # A large search would hold the GIL for a long time; run it where it cannot stall the frame loop
+            try:
+                self.distances = GuidanceField.worker().submit(GuidanceField.path_distances, walls, target).result()
+            except BrokenProcessPool:
+                # Spawning needs an importable main script, which interactive sessions lack
+                print("Warning: Guidance worker process failed. Computing path distances in this process.")
+                GuidanceField.process_pool = None
+        if self.distances is None:
+            self.distances = GuidanceField.path_distances(walls, target)
+        self.max_distance = max(1, int(self.distances.max()))
+
+    @classmethod
+    def worker(cls):
+        if cls.process_pool is None:
+            # Spawned rather than forked, so the worker starts without the display or other threads
+            cls.process_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        return cls.process_pool
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the worker process, if one was started; the next large maze starts a fresh one"""
+        if cls.process_pool is not None:
+            cls.process_pool.shutdown()
+            cls.process_pool = None
+
+    @staticmethod
+    def path_distances(walls, target):
+        """The search itself: distance in cells to the target, -1 for walls and cells with no path"""
+        rows, cols = walls.shape
         
-        maze[1][1] = 'P'  # Player start
-        carve_passages(1, 1)
+        # Pad with wall so flat-index neighbours never wrap around an edge
+        padded_cols = cols + 2
+        open_cells = (~np.pad(walls, 1, constant_values=True)).ravel().tolist()
+        distances = [-1] * len(open_cells)
+        target_index = (target[1] + 1) * padded_cols + target[0] + 1
+        distances[target_index] = 0
         
-        maze[height-2][width-2] = 'E'
+        queue = [target_index]
+        for index in queue:  # The queue grows while it is walked
+            distance = distances[index] + 1
+            for neighbour in (index - 1, index + 1, index - padded_cols, index + padded_cols):
+                if open_cells[neighbour] and distances[neighbour] < 0:
+                    distances[neighbour] = distance
+                    queue.append(neighbour)
         
-        return [''.join(row) for row in maze]
+        return np.array(distances, dtype=np.int32).reshape(rows + 2, padded_cols)[1:-1, 1:-1]
+
+    def cell_distance(self, col, row):
+        """Path distance in cells, or -1 for walls, unreachable cells and anything off the grid"""
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return int(self.distances[row, col])
+        return -1
+
+    def distance_at(self, pos):
+        """Path distance in pixels from a point to the target, or None if there is no path"""
+        distance = self.cell_distance(int(pos[0] // self.cell_size), int(pos[1] // self.cell_size))
+        return None if distance < 0 else distance * self.cell_size
+
+    def next_waypoint(self, pos):
+        """Center of the next cell along the shortest path from a point, or None if there is no path"""
+        col, row = int(pos[0] // self.cell_size), int(pos[1] // self.cell_size)
+        distance = self.cell_distance(col, row)
+        if distance < 0:
+            return None
+        if distance > 0:
+            for dx, dy in self.NEIGHBOURS:
+                if self.cell_distance(col + dx, row + dy) == distance - 1:
+                    col, row = col + dx, row + dy
+                    break
+        return pygame.Vector2((col + 0.5) * self.cell_size, (row + 0.5) * self.cell_size)
+
+class WallTextureAtlas:
+    def __init__(self, variants=WALL_TEXTURE_VARIANTS, seed=None, size=GRID_SIZE):
+        """A seeded batch of noisy wall textures generated in one NumPy pass and packed side by side"""
+        rng = np.random.default_rng(seed)
+        self.variants = variants
+        self.size = size
+        
+        # Base wall color with variation, one per variant
+        base_colors = rng.integers(40, 61, (variants, 3))
+        pixels = np.repeat(base_colors, size * size, axis=0).reshape(variants, size, size, 3)
+        
+        # Add some noise/texture: scattered pixels shaded lighter or darker than the base
+        dots = variants * WALL_NOISE_DOTS
+        variant = np.repeat(np.arange(variants), WALL_NOISE_DOTS)
+        x = rng.integers(0, size, dots)
+        y = rng.integers(0, size, dots)
+        shade = rng.integers(-20, 21, (dots, 1))
+        pixels[variant, x, y] = np.clip(base_colors[variant] + shade, 0, 255)
+        
+        # surfarray is indexed (x, y), so stacking variants along x packs them left to right
+        self.surface = pygame.surfarray.make_surface(pixels.reshape(variants * size, size, 3).astype(np.uint8))
+        self.areas = [pygame.Rect(index * size, 0, size, size) for index in range(variants)]
+
+class Camera:
+    def __init__(self, view_size):
+        """Viewport onto the world that keeps a target centered without showing past the world edges"""
+        self.view = pygame.Rect((0, 0), view_size)
+        self.world = pygame.Rect((0, 0), view_size)
+
+    def set_world(self, world_rect):
+        self.world = pygame.Rect(world_rect)
+
+    @property
+    def offset(self):
+        """World position of the screen's top-left corner"""
+        return self.view.topleft
+
+    def follow(self, target):
+        """Center on a world position; returns True if the view moved"""
+        previous = self.view.topleft
+        self.view.center = (int(target[0]), int(target[1]))
+        for axis in (0, 1):
+            view_size, world_size = self.view.size[axis], self.world.size[axis]
+            if world_size <= view_size:
+                # Smaller than the screen: keep the world centered
+                position = self.world.topleft[axis] - (view_size - world_size) // 2
+            else:
+                position = max(self.world.topleft[axis], min(self.view.topleft[axis], self.world.topleft[axis] + world_size - view_size))
+            if axis == 0:
+                self.view.x = position
+            else:
+                self.view.y = position
+        return self.view.topleft != previous
+
+    def to_screen(self, pos):
+        """World position to integer screen position"""
+        return int(pos[0]) - self.view.x, int(pos[1]) - self.view.y
+
+class ChunkedLevel:
+    def __init__(self, wall_grid, wall_atlas, seed=None, chunk_cells=CHUNK_CELLS, max_chunks=CHUNK_CACHE_SIZE):
+        """Level graphics split into fixed-size chunks, rendered on first sight and evicted least recently seen"""
+        self.wall_grid = wall_grid
+        self.wall_atlas = wall_atlas
+        self.chunk_cells = chunk_cells
+        self.chunk_size = chunk_cells * wall_grid.cell_size  # Chunk edge in pixels
+        self.max_chunks = max_chunks
+        self.world_rect = pygame.Rect(0, 0, wall_grid.cols * wall_grid.cell_size, wall_grid.rows * wall_grid.cell_size)
+        self.variant_salt = 0 if seed is None else seed & 0xFFFFFFF
+        self.chunks = OrderedDict()
+
+    def wall_variants(self, rows, cols):
+        """Texture variant of each wall cell, hashed from its position so nothing is stored per wall"""
+        return ((rows * 73856093) ^ (cols * 19349663) ^ self.variant_salt) % self.wall_atlas.variants
+
+    def gradient_color(self, y):
+        """Background gradient color at a world y, spread over the full world height"""
+        blend = min(1, max(0, y / max(1, self.world_rect.height - 1)))
+        return tuple(int(round(top + (bottom - top) * blend)) for top, bottom in zip(GRADIENT_TOP_COLOR, GRADIENT_BOTTOM_COLOR))
+
+    def chunk(self, chunk_x, chunk_y):
+        """Return a chunk's surface, rendering it on a cache miss"""
+        key = (chunk_x, chunk_y)
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)
+            return surface
+
+        surface = self.render_chunk(chunk_x, chunk_y)
+        self.chunks[key] = surface
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return surface
+
+    def render_chunk(self, chunk_x, chunk_y):
+        """Draw one chunk's slice of the gradient background and its walls"""
+        size = self.chunk_size
+        top = chunk_y * size
+        surface = GradientCache.get((size, size), self.gradient_color(top), self.gradient_color(top + size - 1)).copy()
+
+        # Walls, each drawn from its variant's area of the atlas
+        first_row, first_col = chunk_y * self.chunk_cells, chunk_x * self.chunk_cells
+        cells = self.wall_grid.cells[first_row:first_row + self.chunk_cells, first_col:first_col + self.chunk_cells]
+        rows, cols = np.nonzero(cells)
+        variants = self.wall_variants(rows + first_row, cols + first_col).tolist()
+        corners = zip((cols * self.wall_grid.cell_size).tolist(), (rows * self.wall_grid.cell_size).tolist())
+        areas = self.wall_atlas.areas
+        surface.blits([(self.wall_atlas.surface, corner, areas[variant]) for corner, variant in zip(corners, variants)], doreturn=False)
+        return surface
+
+    def draw(self, surface, region, offset):
+        """Paint the part of the world behind a screen region, given the camera offset"""
+        world = region.move(offset)
+        if not self.world_rect.contains(world):
+            surface.fill(BACKGROUND_COLOR, region)
+            world = world.clip(self.world_rect)
+            if not world.width or not world.height:
+                return
+
+        size = self.chunk_size
+        batch = []
+        for chunk_y in range(world.top // size, (world.bottom - 1) // size + 1):
+            for chunk_x in range(world.left // size, (world.right - 1) // size + 1):
+                chunk_rect = pygame.Rect(chunk_x * size, chunk_y * size, size, size)
+                area = chunk_rect.clip(world)
+                batch.append((
+                    self.chunk(chunk_x, chunk_y),
+                    (area.x - offset[0], area.y - offset[1]),
+                    area.move(-chunk_rect.x, -chunk_rect.y)
+                ))
+        surface.blits(batch, doreturn=False)
+
+class GradientCache:
+    surfaces = OrderedDict()  # Shared by every game instance, keyed by (size, top color, bottom color)
+    lock = threading.Lock()  # Class-wide state, so get() may be called from any thread, e.g. the level preloader
+
+    @classmethod
+    def get(cls, size, top_color=GRADIENT_TOP_COLOR, bottom_color=GRADIENT_BOTTOM_COLOR):
+        """Return the display-format vertical gradient for a size and palette, building it on first use."""
+        key = (tuple(size), tuple(top_color), tuple(bottom_color))
+        with cls.lock:
+            surface = cls.surfaces.get(key)
+            if surface is not None:
+                cls.surfaces.move_to_end(key)
+                return surface
+
+        # Rendered outside the lock; if two threads race, both get the first surface stored
+        surface = cls.render(size, top_color, bottom_color)
+        with cls.lock:
+            surface = cls.surfaces.setdefault(key, surface)
+            cls.surfaces.move_to_end(key)
+            if len(cls.surfaces) > GRADIENT_CACHE_SIZE:
+                cls.surfaces.popitem(last=False)
+        return surface
+
+    @staticmethod
+    def render(size, top_color, bottom_color):
+        """Build the gradient in one vectorized pass instead of one line per row"""
+        width, height = size
+        blend = np.linspace(0, 1, height)[:, np.newaxis]
+        column = np.array(top_color) + (np.array(bottom_color) - np.array(top_color)) * blend
+        pixels = np.repeat(column.astype(np.uint8)[np.newaxis], width, axis=0)  # surfarray is (x, y, rgb)
+        return pygame.surfarray.make_surface(pixels).convert()
+
+class AssetManager:
+    def __init__(self, threads=ASSET_LOADER_THREADS):
+        """Images and sounds decoded on background threads, converted once and kept for every game"""
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asset-load')
+        self.pending = {}  # Decodes in flight, keyed by (kind, path)
+        self.images = {}  # Display-format surfaces, keyed by (path, alpha)
+        self.sounds = {}
+
+    def prefetch_image(self, path):
+        """Start decoding an image in the background"""
+        self.submit('image', path, pygame.image.load)
+
+    def prefetch_sound(self, path):
+        """Start decoding a sound in the background; needs the mixer running"""
+        self.submit('sound', path, pygame.mixer.Sound)
+
+    def submit(self, kind, path, decode):
+        key = (kind, path)
+        if key not in self.pending:
+            self.pending[key] = self.executor.submit(decode, path)
+
+    def decoded(self, kind, path, decode):
+        """Wait for a background decode, or decode now if none was started"""
+        future = self.pending.pop((kind, path), None)
+        return future.result() if future is not None else decode(path)
+
+    def image(self, path, alpha=False):
+        """Display-format image, converted on first use; raises pygame.error if it cannot be loaded"""
+        key = (path, alpha)
+        surface = self.images.get(key)
+        if surface is None:
+            surface = self.decoded('image', path, pygame.image.load)
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            self.images[key] = surface
+        return surface
+
+    def sound(self, path):
+        """Decoded sound, or a silent one if the file cannot be loaded"""
+        sound = self.sounds.get(path)
+        if sound is None:
+            try:
+                sound = self.decoded('sound', path, pygame.mixer.Sound)
+            except (pygame.error, FileNotFoundError):
+                # If sound loading fails, create a silent placeholder sound
+                print(f"Warning: Could not load '{path}'. Using a silent sound.")
+                sound = pygame.mixer.Sound(buffer=bytes(1000))
+            self.sounds[path] = sound
+        return sound
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.pending.clear()
+
+class AudioManager:
+    def __init__(self, assets):
+        """Reserved channel for the looping guidance buzz; the mixer itself belongs to the runtime context"""
+        pygame.mixer.set_reserved(1)
+        self.guidance_channel = pygame.mixer.Channel(0)  # Never handed out to other sounds
+        self.guidance_sound = assets.sound(GUIDANCE_SOUND)  # Buzzing sound for sound-based navigation
+        self.guidance_volume = None  # (left, right) last sent to the mixer
+
+    def update_guidance(self, volume, pan=0):
+        """Keep the guidance loop playing at a volume and left/right pan (-1 to 1)"""
+        if not self.guidance_channel.get_busy():
+            self.guidance_channel.play(self.guidance_sound, loops=-1)
+            self.guidance_volume = None
+
+        left = volume * min(1, 1 - pan)
+        right = volume * min(1, 1 + pan)
+        # Only talk to the mixer when the change is audible
+        if (self.guidance_volume is None
+                or abs(left - self.guidance_volume[0]) > AUDIO_VOLUME_THRESHOLD
+                or abs(right - self.guidance_volume[1]) > AUDIO_VOLUME_THRESHOLD):
+            self.guidance_channel.set_volume(left, right)
+            self.guidance_volume = (left, right)
+
+    def stop_guidance(self):
+        self.guidance_channel.stop()
+        self.guidance_volume = None
+
+class VisibilityEngine:
+    def __init__(self, wall_grid, subcells=VISIBILITY_SUBCELLS, ring_rays=VISIBILITY_RING_RAYS, bucket_cells=CHUNK_CELLS):
+        """Line-of-sight polygons cast against wall edges that are merged once per level"""
+        self.cell_size = wall_grid.cell_size
+        self.subcell_size = wall_grid.cell_size / subcells
+        edges = self.extract_edges(wall_grid.cells)
+        self.segments = edges * wall_grid.cell_size  # (x1, y1, x2, y2) in pixels
+        self.bucket_size = bucket_cells * wall_grid.cell_size
+        self.bucket_columns = wall_grid.cols // bucket_cells + 1
+        self.bucket_starts, self.bucket_segments = self.bucket_edges(edges.astype(np.int32) // bucket_cells)
+        self.ring = np.linspace(-math.pi, math.pi, ring_rays, endpoint=False)
+        self.key = None  # Sub-cell and radius of the cached polygon
+        self.polygon = None
+
+    @staticmethod
+    def extract_edges(cells):
+        """Wall/floor boundaries merged into maximal straight segments, in cell units"""
+        # Outside the maze counts as wall, as it does for collisions
+        padded = np.pad(cells, 1, constant_values=True)
+        segments = []
+        for boundaries, horizontal in (
+            (padded[:-1, 1:-1] != padded[1:, 1:-1], True),  # Between rows, one line per row boundary
+            (padded[1:-1, :-1] != padded[1:-1, 1:], False)   # Between columns, one line per column boundary
+        ):
+            lines = boundaries if horizontal else boundaries.T
+            # Runs of consecutive boundary cells along each line become single segments
+            steps = np.diff(np.pad(lines.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+            line, start = np.nonzero(steps == 1)
+            end = np.nonzero(steps == -1)[1]
+            if horizontal:
+                segments.append(np.column_stack((start, line, end, line)))
+            else:
+                segments.append(np.column_stack((line, start, line, end)))
+        return np.concatenate(segments).astype(np.float32)
+
+    def bucket_edges(self, cells):
+        """Index the segments by the coarse blocks they touch, given their end blocks, so a sweep only looks at walls near the light"""
+        first_x, first_y = np.minimum(cells[:, 0], cells[:, 2]), np.minimum(cells[:, 1], cells[:, 3])
+        last_x, last_y = np.maximum(cells[:, 0], cells[:, 2]), np.maximum(cells[:, 1], cells[:, 3])
+        
+        # Segments are axis-aligned, so each one runs along a single row or column of blocks
+        counts = (last_x - first_x + 1) * (last_y - first_y + 1)
+        segment = np.repeat(np.arange(len(cells)), counts)
+        step = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        horizontal = np.repeat(last_x > first_x, counts)
+        bucket_x = np.repeat(first_x, counts) + np.where(horizontal, step, 0)
+        bucket_y = np.repeat(first_y, counts) + np.where(horizontal, 0, step)
+        
+        # Group segment indices by block id, with each block's slice given by starts[id]:starts[id + 1]
+        buckets = bucket_y * self.bucket_columns + bucket_x
+        order = np.argsort(buckets)
+        bucket_count = (int(buckets.max()) + 1) if len(buckets) else 0
+        starts = np.searchsorted(buckets[order], np.arange(bucket_count + 1))
+        return starts, segment[order]
+
+    def nearby_segments(self, origin, radius):
+        """Indices of the segments in the blocks overlapping a square around a point"""
+        first_x, first_y = (max(0, int((value - radius) // self.bucket_size)) for value in origin)
+        last_x, last_y = (int((value + radius) // self.bucket_size) for value in origin)
+        last_x = min(last_x, self.bucket_columns - 1)
+        slices = []
+        for bucket_y in range(first_y, last_y + 1):
+            for bucket_x in range(first_x, last_x + 1):
+                bucket = bucket_y * self.bucket_columns + bucket_x
+                if bucket + 1 < len(self.bucket_starts):
+                    slices.append(self.bucket_segments[self.bucket_starts[bucket]:self.bucket_starts[bucket + 1]])
+        if not slices:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(slices))  # Long segments sit in several blocks
+
+    def subcell(self, pos):
+        """Sub-cell a world position falls in"""
+        return int(pos[0] // self.subcell_size), int(pos[1] // self.subcell_size)
+
+    def visible_polygon(self, pos, radius):
+        """Polygon seen from a position within radius, relative to it; reused until the position leaves its sub-cell"""
+        key = (self.subcell(pos), radius)
+        if key != self.key:
+            self.key = key
+            self.polygon = self.sweep(key[0], radius)
+        return self.polygon
+
+    def sweep(self, subcell, radius):
+        """Cast rays at every nearby segment end and around the circle, keeping the nearest hit of each"""
+        origin = np.array([(subcell[0] + 0.5) * self.subcell_size, (subcell[1] + 0.5) * self.subcell_size], dtype=np.float32)
+
+        # Only walls that can fall inside the light matter: the nearby blocks, then their exact extents
+        segments = self.segments[self.nearby_segments(origin.tolist(), radius)]
+        near = (
+            (np.minimum(segments[:, 0], segments[:, 2]) <= origin[0] + radius) &
+            (np.maximum(segments[:, 0], segments[:, 2]) >= origin[0] - radius) &
+            (np.minimum(segments[:, 1], segments[:, 3]) <= origin[1] + radius) &
+            (np.maximum(segments[:, 1], segments[:, 3]) >= origin[1] - radius)
+        )
+        starts = segments[near, :2] - origin
+        spans = segments[near, 2:] - segments[near, :2]
+
+        # Rays just either side of every corner, so the sweep slips past them
+        corners = np.concatenate((starts, starts + spans))
+        corner_angles = np.arctan2(corners[:, 1], corners[:, 0])
+        angles = np.sort(np.concatenate((corner_angles - 1e-4, corner_angles + 1e-4, self.ring)))
+        rays = np.column_stack((np.cos(angles), np.sin(angles)))
+
+        # Ray/segment intersections for every pair at once
+        cross = lambda a, b: a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            denominator = cross(rays[:, np.newaxis], spans[np.newaxis])
+            distance = cross(starts[np.newaxis], spans[np.newaxis]) / denominator
+            along = cross(starts[np.newaxis], rays[:, np.newaxis]) / denominator
+        hits = (denominator != 0) & (distance >= 0) & (along >= 0) & (along <= 1)
+        nearest = np.where(hits, distance, radius).min(axis=1, initial=radius)
+
+        return (rays * nearest[:, np.newaxis]).tolist()
+
+class LightMaskCache:
+    def __init__(self, light_color, max_entries=LIGHT_CACHE_SIZE):
+        """Bounded cache of pre-rendered radial light sprites, keyed by radius."""
+        self.light_color = light_color
+        self.max_entries = max_entries
+        self.sprites = OrderedDict()  # Least recently used sprite first
+
+    def get(self, radius):
+        """Return the light sprite for a radius, rendering it once on a cache miss."""
+        sprite = self.sprites.get(radius)
+        if sprite is not None:
+            self.sprites.move_to_end(radius)
+            return sprite
+
+        sprite = self.render(radius)
+        self.sprites[radius] = sprite
+        if len(self.sprites) > self.max_entries:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def render(self, radius):
+        """Draw the radial falloff into a radius-sized sprite, centered on (radius, radius)."""
+        sprite = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+
+        # Draw gradually transparent light circles to simulate a soft glow
+        for alpha in range(radius, 0, -10):
+            gradient_alpha = int(255 * (1 - alpha / radius))  # Calculate alpha transparency for gradient
+            pygame.draw.circle(sprite, self.light_color + (gradient_alpha,), (radius, radius), alpha)
+
+        return sprite
+
+    def clear(self):
+        """Drop every cached sprite"""
+        self.sprites.clear()
 
 class LightEngine:
     def __init__(self, screen_width, screen_height, darkness_level=1):
         """Initialize light engine to simulate the player's limited vision in the dark."""
+        self.darkness_level = darkness_level
         self.light_radius = max(50, 200 - (darkness_level * 50)) # Set the light radius based on the darkness level, affecting visibility
         self.light_color = (255, 240, 200)  # Warm yellowish light
         self.flicker_intensity = 15  # Intensity of the light flickering effect
         self.noise_time = 0  # Track time to control flickering movement
 
-        # Initialize sound mixer
-        pygame.mixer.init()
-        
-        try:
-            # Load buzzing sound for sound-based navigation
-            self.buzz_sound = pygame.mixer.Sound('spook.wav')
-        except pygame.error:
-            # If sound loading fails, create a silent placeholder sound
-            print("Warning: Could not load 'buzz.wav'. Using a silent sound.")
-            self.buzz_sound = pygame.mixer.Sound(buffer=bytes(1000))
-        
-        # Initially mute the buzz sound
-        self.buzz_sound.set_volume(0)
+        # Pre-rendered light sprites and the persistent overlay they are composited onto
+        self.mask_cache = LightMaskCache(self.light_color)
+        self.overlay = pygame.Surface((screen_width, screen_height), pygame.SRCALPHA)
+        self.overlay.fill(DARK_OVERLAY_COLOR)
+        self.light_rect = None  # Region of the overlay currently lit
+
+        # Line of sight; without it the light shines through walls
+        self.visibility = None
+        self.shadow_key = None  # Polygon the shadowed sprites were cut with
+        self.shadowed = {}  # Light sprites cut to the current polygon, by radius
+
         self.light_timer = 0  # Timer to control how long the light lasts
         self.light_duration = 20  # Initial light duration in seconds
 
-    def create_light_surface(self, player_pos):
-        """Create a light source centered around the player with dynamic flickering."""
-        light_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)  # Surface with alpha transparency
-        
-        self.noise_time += 0.1  # Increment time to animate flickering
+    def set_darkness_level(self, darkness_level):
+        """Shrink the light for a new darkness level, evicting sprites of the old radius."""
+        if darkness_level == self.darkness_level:
+            return
+        self.darkness_level = darkness_level
+        self.light_radius = max(50, 200 - (darkness_level * 50))
+        self.mask_cache.clear()
+
+    def set_visibility(self, visibility):
+        """Cast shadows against a level's walls"""
+        self.visibility = visibility
+        self.shadow_key = None
+        self.shadowed.clear()
+
+    def shadow_light(self, light_surface, radius, world_pos):
+        """Cut a light sprite down to what can be seen from a world position"""
+        # One polygon covers every flicker radius, so the sprites only change with the sub-cell
+        polygon = self.visibility.visible_polygon(world_pos, self.light_radius + self.flicker_intensity)
+        if polygon is not self.shadow_key:
+            self.shadow_key = polygon
+            self.shadowed.clear()
+
+        shadowed = self.shadowed.get(radius)
+        if shadowed is None:
+            shadowed = pygame.Surface(light_surface.get_size(), pygame.SRCALPHA)
+            pygame.draw.polygon(shadowed, (255, 255, 255, 255), [(x + radius, y + radius) for x, y in polygon])
+            shadowed.blit(light_surface, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+            self.shadowed[radius] = shadowed
+        return shadowed
+
+    def create_light_surface(self, player_pos, world_pos=None):
+        """Return the cached light sprite for this frame's flicker and the top-left to draw it at."""
+        self.noise_time = pygame.time.get_ticks() / 1000 * LIGHT_FLICKER_RATE  # Animate from elapsed time, like the exit pulse
         # Calculate the flickering offset based on sine and cosine waves for smooth variation
         flicker_x = math.sin(self.noise_time) * self.flicker_intensity
         flicker_y = math.cos(self.noise_time) * self.flicker_intensity
-        current_radius = self.light_radius + abs(flicker_x)  # Adjust radius based on flickering
+
+        # Quantize the flicker so every frame maps onto one of a few pre-rendered radii
+        flicker_step = int(abs(flicker_x) * LIGHT_FLICKER_STEPS / self.flicker_intensity)
+        current_radius = self.light_radius + flicker_step * self.flicker_intensity // LIGHT_FLICKER_STEPS
+        light_surface = self.mask_cache.get(current_radius)
+        if self.visibility is not None and world_pos is not None:
+            light_surface = self.shadow_light(light_surface, current_radius, world_pos)
+
+        # Slight offset to the light center to make it feel less rigid
+        offset_pos = (
+            int(player_pos[0] + flicker_x * 0.1) - current_radius,
+            int(player_pos[1] + flicker_y * 0.1) - current_radius
+        )
+        return light_surface, offset_pos
+
+    def render_overlay(self, player_pos, world_pos=None):
+        """Cut the light out of the persistent dark overlay, redrawing only the dirty rectangles."""
+        light_surface, offset_pos = self.create_light_surface(player_pos, world_pos)
+        self.clear_light()
+        self.light_rect = self.overlay.blit(light_surface, offset_pos, special_flags=pygame.BLEND_RGBA_SUB)
+        return self.overlay
+
+    def clear_light(self):
+        """Restore full darkness where the light was last drawn"""
+        if self.light_rect is not None:
+            self.overlay.fill(DARK_OVERLAY_COLOR, self.light_rect)
+            self.light_rect = None
+
+class ParticlePool:
+    def __init__(self, capacity=PARTICLE_CAPACITY, color=PARTICLE_COLOR, seed=None):
+        """Fixed-capacity particle storage held as parallel NumPy arrays"""
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.size = np.zeros(capacity, dtype=np.int32)
+        self.lifetime = np.zeros(capacity, dtype=np.float32)  # Slots at or below zero are free
+        self.next_slot = 0  # Ring-buffer write position
+        self.rng = np.random.default_rng(seed)
         
-        # Draw gradually transparent light circles to simulate a soft glow
-        for alpha in range(int(current_radius), 0, -10):
-            gradient_alpha = int(255 * (1 - alpha / current_radius))  # Calculate alpha transparency for gradient
-            light_color = self.light_color + (gradient_alpha,)  # Create a color with transparency
-            
-            # Slight offset to the light center to make it feel less rigid
-            offset_pos = (
-                player_pos[0] + flicker_x * 0.1, 
-                player_pos[1] + flicker_y * 0.1
-            )
-            
-            # Draw the light circles at the player's position
-            pygame.draw.circle(light_surface, light_color, 
-                               offset_pos, 
-                               alpha)
+        # One pre-drawn circle sprite per particle size, so drawing is a single batched blits call
+        self.sprites = {}
+        for size in range(2, 5):
+            sprite = pygame.Surface((size * 2 + 1, size * 2 + 1))
+            sprite.set_colorkey((0, 0, 0))
+            pygame.draw.circle(sprite, color, (size, size), size)
+            self.sprites[size] = sprite.convert()
+
+    def emit(self, origin, count):
+        """Spawn particles around a point, overwriting the oldest slots when the pool is full"""
+        slots = (self.next_slot + np.arange(count)) % self.capacity
+        self.next_slot = (self.next_slot + count) % self.capacity
         
-        return light_surface  # Return the generated light surface
+        self.pos[slots] = (origin[0], origin[1])
+        self.pos[slots] += self.rng.uniform(-10, 10, (count, 2))
+        self.velocity[slots] = self.rng.uniform(-1, 1, (count, 2))
+        self.size[slots] = self.rng.uniform(2, 5, count)
+        self.lifetime[slots] = self.rng.uniform(0.5, 1.5, count)
 
-class EchoingDepthsGame:
-    def __init__(self, starting_level=1):
+    def update(self, dt):
+        """Integrate and age every particle in one vectorized step"""
+        self.pos += self.velocity
+        self.lifetime -= dt
+
+    def draw(self, surface, offset=(0, 0)):
+        """Blit all live particles in one batch, shifted from world to screen by the camera offset"""
+        alive = np.flatnonzero(self.lifetime > 0)
+        if not len(alive):
+            return
+        sizes = self.size[alive].tolist()
+        corners = (self.pos[alive].astype(np.int32) - self.size[alive, np.newaxis] - offset).tolist()
+        surface.blits([(self.sprites[size], corner) for size, corner in zip(sizes, corners)], doreturn=False)
+
+    def bounds(self):
+        """World rect covering every live particle, or None when there are none"""
+        alive = np.flatnonzero(self.lifetime > 0)
+        if not len(alive):
+            return None
+        corners = self.pos[alive].astype(np.int32)
+        sizes = self.size[alive, np.newaxis]
+        left, top = (corners - sizes).min(axis=0).tolist()
+        right, bottom = (corners + sizes + 1).max(axis=0).tolist()
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def clear(self):
+        """Expire every particle"""
+        self.lifetime.fill(0)
+
+class TextCache:
+    def __init__(self, font, max_entries=TEXT_CACHE_SIZE):
+        """LRU cache of rendered text surfaces for one font"""
+        self.font = font
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+
+    def render(self, text, color, antialias=True):
+        """Same as font.render, but unchanged strings reuse the surface from last time"""
+        key = (text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+class GlyphAtlas:
+    def __init__(self, font, color, characters=TIMER_GLYPHS):
+        """Pre-rendered single characters, so fast-changing numbers never hit the font rasterizer"""
+        self.font = font
+        self.glyphs = {char: font.render(char, True, color) for char in characters}
+        self.height = font.get_height()
+
+    def draw(self, surface, text, pos):
+        """Blit text glyph by glyph and return the covered rect"""
+        x, y = pos
+        batch = []
+        for char in text:
+            glyph = self.glyphs[char]
+            batch.append((glyph, (x, y)))
+            x += glyph.get_width()
+        surface.blits(batch, doreturn=False)
+        return pygame.Rect(pos[0], y, x - pos[0], self.height)
+
+class DirtyRectTracker:
+    def __init__(self, screen_rect):
+        """Collects the screen regions drawn each frame so only those are repainted and pushed"""
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.previous = []  # Drawn last frame; repainted this frame to erase what moved away
+        self.current = []
+        self.full = True  # Repaint and push the whole screen on the next frame
+        self.push_all = False  # Push the whole screen even though only some regions were repainted
+
+    def add(self, rect):
+        """Mark a region drawn this frame; None and off-screen rects are ignored"""
+        if rect is not None:
+            rect = self.screen_rect.clip(rect)
+            if rect.width and rect.height:
+                self.current.append(rect)
+
+    def invalidate(self):
+        """Force a full repaint, e.g. after a level change"""
+        self.full = True
+
+    def scroll(self, surface, dx, dy):
+        """Shift the screen contents with the camera, leaving only the exposed strips and moved sprites to repaint"""
+        if self.full:
+            return
+        width, height = self.screen_rect.size
+        if abs(dx) >= width or abs(dy) >= height:
+            self.invalidate()
+            return
+        
+        surface.scroll(dx, dy)
+        # Last frame's sprites moved along with the background, so erase them where they ended up
+        self.previous = [rect.move(dx, dy) for rect in self.previous]
+        if dx:
+            self.previous.append(pygame.Rect(0 if dx > 0 else width + dx, 0, abs(dx), height))
+        if dy:
+            self.previous.append(pygame.Rect(0, 0 if dy > 0 else height + dy, width, abs(dy)))
+        self.previous = [rect.clip(self.screen_rect) for rect in self.previous]
+        self.push_all = True  # Every pixel of the screen moved
+
+    def regions(self):
+        """Disjoint regions to repaint this frame: everything drawn now or in the previous frame"""
+        if self.full:
+            return [self.screen_rect.copy()]
+        return self.merge(self.previous + self.current)
+
+    def present(self, regions):
+        """Push the repainted regions to the display and start the next frame"""
+        if self.full or self.push_all:
+            pygame.display.flip()
+        else:
+            pygame.display.update(regions)
+        self.previous = self.current
+        self.current = []
+        self.full = False
+        self.push_all = False
+
+    @staticmethod
+    def merge(rects):
+        """Union overlapping rects until the rest are disjoint, so no region is composited twice"""
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            index = 0
+            while index < len(merged):
+                if rect.colliderect(merged[index]):
+                    rect.union_ip(merged.pop(index))
+                    index = 0
+                else:
+                    index += 1
+            merged.append(rect)
+        return merged
+
+class FixedStepScheduler:
+    def __init__(self, step=SIMULATION_STEP, max_steps=MAX_CATCH_UP_STEPS):
+        """Pays out real elapsed time as whole fixed-length simulation steps"""
+        self.step = step
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        """Add elapsed seconds and return how many simulation steps to run now"""
+        self.accumulator += elapsed
+        steps = int(self.accumulator // self.step)
+        if steps > self.max_steps:
+            # Too far behind to catch up; drop the backlog instead of spiralling
+            steps = self.max_steps
+            self.accumulator %= self.step
+        else:
+            self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self):
+        """How far rendering is between the last two simulation steps, from 0 to 1"""
+        return self.accumulator / self.step
+
+    def reset(self):
+        self.accumulator = 0.0
+
+class PhaseTimer:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        phases = self.profiler.current
+        phases[self.name] = phases.get(self.name, 0) + time.perf_counter() - self.start
+
+class FrameProfiler:
+    NULL_PHASE = nullcontext()  # Shared no-op returned while profiling is off
+
+    def __init__(self, enabled=False, history=PROFILER_HISTORY, budget=1 / FPS):
+        """Per-phase frame timings kept in a ring buffer of recent frames"""
+        self.enabled = enabled
+        self.always_enabled = enabled  # Requested by the caller, independent of the overlay
+        self.show_overlay = False
+        self.budget = budget  # Frames whose work takes longer than this are flagged
+        self.frames = deque(maxlen=history)
+        self.frame_count = 0
+        self.current = {}
+        self.frame_start = None  # Set while a profiled frame is open
+        self.text_cache = None  # Used when draw() is not given the game's shared cache
+        self.glyphs = {}  # Number glyphs per color, for the font of the last cache drawn with
+
+    def toggle_overlay(self):
+        """Show or hide the overlay; profiling runs while it is visible"""
+        was_enabled = self.enabled
+        self.show_overlay = not self.show_overlay
+        self.enabled = self.show_overlay or self.always_enabled
+        if self.enabled != was_enabled:
+            self.frame_start = None  # Drop the frame in flight; it was not timed from start to end
+            self.current = {}
+
+    def phase(self, name):
+        """Time a block under a phase name; phases used several times in a frame accumulate"""
+        if not self.enabled:
+            return self.NULL_PHASE
+        return PhaseTimer(self, name)
+
+    def begin_frame(self):
+        if self.enabled:
+            self.current = {}
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Close the frame, recording its phases and whether it missed the budget"""
+        if not self.enabled or self.frame_start is None:
+            self.frame_start = None  # Never carry an open frame or its phases into a later one
+            self.current = {}
+            return
+        total = time.perf_counter() - self.frame_start
+        self.frame_start = None
+        self.frames.append({
+            'frame': self.frame_count,
+            'total': total,
+            'over_budget': total > self.budget,
+            'phases': self.current,
+        })
+        self.frame_count += 1
+
+    def phase_means(self):
+        """Mean seconds per phase over the buffered frames"""
+        sums = {}
+        for frame in self.frames:
+            for name, seconds in frame['phases'].items():
+                sums[name] = sums.get(name, 0) + seconds
+        return {name: seconds / len(self.frames) for name, seconds in sums.items()}
+
+    def export(self, path):
+        """Write the buffered frames as CSV (one column per phase) or JSON, chosen by extension"""
+        if path.endswith('.csv'):
+            names = sorted({name for frame in self.frames for name in frame['phases']})
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['frame', 'total', 'over_budget'] + names)
+                for frame in self.frames:
+                    writer.writerow([frame['frame'], frame['total'], int(frame['over_budget'])]
+                                    + [frame['phases'].get(name, 0) for name in names])
+        else:
+            with open(path, 'w') as f:
+                json.dump({'budget': self.budget, 'frames': list(self.frames)}, f, indent=1)
+
+    def draw(self, surface, pos, text_cache=None):
+        """Draw average frame and phase times plus missed-budget frames, in ms"""
+        if not self.show_overlay or not self.frames:
+            return
+        if text_cache is None:
+            if self.text_cache is None:
+                self.text_cache = TextCache(pygame.font.Font(None, PROFILER_FONT_SIZE))
+            text_cache = self.text_cache
+
+        totals = [frame['total'] for frame in self.frames]
+        missed = sum(frame['over_budget'] for frame in self.frames)
+        lines = [
+            ("frame ms ", f"{np.mean(totals) * 1000:.2f}", False),
+            ("p99 ms ", f"{np.percentile(totals, 99) * 1000:.2f}", False),
+            ("over budget ", f"{missed}/{len(self.frames)}", missed > 0),
+        ]
+        lines += [(f"{name} ", f"{seconds * 1000:.2f}", False) for name, seconds in self.phase_means().items()]
+
+        # Labels repeat every frame and come from the cache; the changing numbers are drawn glyph by glyph
+        x, y = pos
+        batch = []
+        for label, value, warning in lines:
+            color = (255, 120, 120) if warning else (180, 255, 180)
+            label_surface = text_cache.render(label, color)
+            batch.append((label_surface, (x, y)))
+            self.number_glyphs(text_cache.font, color).draw(surface, value, (x + label_surface.get_width(), y))
+            y += 18
+        surface.blits(batch, doreturn=False)
+
+    def number_glyphs(self, font, color):
+        """Glyph atlas for overlay numbers in a color, rebuilt if the font changes"""
+        atlas = self.glyphs.get(color)
+        if atlas is None or atlas.font is not font:
+            atlas = GlyphAtlas(font, color, PROFILER_GLYPHS)
+            self.glyphs[color] = atlas
+        return atlas
+
+class LevelData:
+    def __init__(self, level, maze, wall_grid, wall_atlas, chunks, player_pos, exit_pos, guidance, visibility):
+        """Everything setup_level swaps in for one level"""
+        self.level = level
+        self.maze = maze  # uint8 grid from MazeGenerator
+        self.digest = self.grid_digest(maze, player_pos, exit_pos)  # Identifies the level data for replays
+        self.wall_grid = wall_grid
+        self.wall_atlas = wall_atlas
+        self.chunks = chunks  # Level graphics, rendered lazily as the camera reaches them
+        self.player_pos = player_pos
+        self.exit_pos = exit_pos
+        self.guidance = guidance  # Path distances to the exit for the sound guidance
+        self.visibility = visibility  # Merged wall edges the light casts shadows from
+
+    @staticmethod
+    def grid_digest(maze, player_pos, exit_pos):
+        """Hash of a maze grid with its start and exit, however the level was loaded or generated"""
+        maze = np.ascontiguousarray(maze, dtype=np.uint8)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(struct.pack('<IIdddd', *maze.shape, *player_pos, *exit_pos))
+        digest.update(maze.tobytes())
+        return digest.digest()
+
+class LevelPreloader:
+    def __init__(self, build_level):
+        """Build upcoming levels on a worker thread so level transitions only swap data in"""
+        self.build_level = build_level
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='level-preload')
+        self.pending = {}
+
+    def request(self, level):
+        """Start building a level in the background"""
+        if level not in self.pending:
+            self.pending[level] = self.executor.submit(self.build_level, level)
+
+    def take(self, level):
+        """Return a level, waiting for the worker if it is still busy or building it here if never requested"""
+        future = self.pending.pop(level, None)
+        if future is None:
+            return self.build_level(level)
+        return future.result()
+
+    def shutdown(self, wait=False):
+        """Drop queued work and let the worker thread exit; with wait, block until a build in progress ends"""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        self.pending.clear()
+
+class HeldKeys:
+    def __init__(self, keys=()):
+        """Key state in the shape of pygame.key.get_pressed(), for scripted input"""
+        self.keys = frozenset(keys)
+
+    def __getitem__(self, key):
+        return key in self.keys
+
+class ScriptedInput:
+    def __init__(self, script, loop=True):
+        """Play back a list of (frames, keys) steps, holding each set of keys for that many frames"""
+        self.frames = [HeldKeys(keys) for count, keys in script for _ in range(count)]
+        self.loop = loop
+        self.index = 0
+
+    def __call__(self):
+        if self.index >= len(self.frames):
+            if not self.loop or not self.frames:
+                return HeldKeys()
+            self.index = 0
+        keys = self.frames[self.index]
+        self.index += 1
+        return keys
+
+class RandomInput:
+    def __init__(self, seed=None, hold_frames=15):
+        """Hold a random direction (or nothing) for a few frames at a time"""
+        self.rng = random.Random(seed)
+        self.hold_frames = hold_frames
+        self.choices = [HeldKeys()] + [HeldKeys([key]) for key in (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT)]
+        self.keys = self.choices[0]
+        self.remaining = 0
+
+    def __call__(self):
+        if self.remaining <= 0:
+            self.keys = self.rng.choice(self.choices)
+            self.remaining = self.hold_frames
+        self.remaining -= 1
+        return self.keys
+
+class InputLog:
+    HEADER = struct.Struct('<4sHHqII')  # Magic, version, starting level, game seed, level seed count, level digest count
+    LEVEL_SEED = struct.Struct('<Hq')  # Level, maze seed (-1 for none)
+    LEVEL_DIGEST = struct.Struct('<H16s')  # Level, LevelData.grid_digest of the level as it was played
+    FINAL_STATE = struct.Struct('<HddddqI')  # Level, player x/y, level time, light timer, total score, simulation steps
+    RUN = struct.Struct('<BH')  # Key bitmask, consecutive steps it was held for
+
+    def __init__(self, starting_level, seed, level_seeds=None, level_digests=None):
+        """Everything needed to replay a session: its seeds, level digests and a key bitmask per simulation step"""
+        self.starting_level = starting_level
+        self.seed = seed
+        self.level_seeds = {} if level_seeds is None else level_seeds
+        self.level_digests = {} if level_digests is None else level_digests  # Replays must load identical levels
+        self.masks = bytearray()
+        self.final_state = None  # Game.simulation_state() when recording stopped
+
+    @staticmethod
+    def mask(keys):
+        """Pack the recorded keys of a get_pressed()-style state into one byte"""
+        return sum(1 << bit for bit, key in enumerate(INPUT_LOG_KEYS) if keys[key])
+
+    @property
+    def steps(self):
+        return self.final_state[-1] if self.final_state is not None else len(self.masks)
+
+    def runs(self):
+        """Run-length encode the masks; held keys make most sessions a few bytes per second"""
+        runs = []
+        for mask in self.masks:
+            if runs and runs[-1][0] == mask and runs[-1][1] < 0xFFFF:
+                runs[-1][1] += 1
+            else:
+                runs.append([mask, 1])
+        return runs
+
+    def write(self, path):
+        runs = self.runs()
+        level_seeds = sorted((level, -1 if seed is None else seed) for level, seed in self.level_seeds.items())
+        level_digests = sorted(self.level_digests.items())
+        with open(path, 'wb') as f:
+            f.write(self.HEADER.pack(INPUT_LOG_MAGIC, INPUT_LOG_VERSION, self.starting_level, self.seed,
+                                     len(level_seeds), len(level_digests)))
+            for level_seed in level_seeds:
+                f.write(self.LEVEL_SEED.pack(*level_seed))
+            for level_digest in level_digests:
+                f.write(self.LEVEL_DIGEST.pack(*level_digest))
+            f.write(self.FINAL_STATE.pack(*self.final_state))
+            f.write(struct.pack('<I', len(runs)))
+            f.write(b''.join(self.RUN.pack(mask, count) for mask, count in runs))
+
+    @classmethod
+    def read(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        
+        magic, version, starting_level, seed, seed_count, digest_count = cls.HEADER.unpack_from(data, 0)
+        if magic != INPUT_LOG_MAGIC or version != INPUT_LOG_VERSION:
+            raise ValueError(f"{path} is not a version {INPUT_LOG_VERSION} input log")
+        offset = cls.HEADER.size
+        
+        level_seeds = {}
+        for _ in range(seed_count):
+            level, level_seed = cls.LEVEL_SEED.unpack_from(data, offset)
+            level_seeds[level] = None if level_seed < 0 else level_seed
+            offset += cls.LEVEL_SEED.size
+        level_digests = {}
+        for _ in range(digest_count):
+            level, digest = cls.LEVEL_DIGEST.unpack_from(data, offset)
+            level_digests[level] = digest
+            offset += cls.LEVEL_DIGEST.size
+        log = cls(starting_level, seed, level_seeds, level_digests)
+        log.final_state = cls.FINAL_STATE.unpack_from(data, offset)
+        offset += cls.FINAL_STATE.size
+        
+        (run_count,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        for mask, count in cls.RUN.iter_unpack(data[offset:offset + run_count * cls.RUN.size]):
+            log.masks.extend(bytes([mask]) * count)
+        return log
+
+class InputRecorder:
+    def __init__(self, source, log):
+        """Pass input through from another source while appending it to an input log"""
+        self.source = source
+        self.log = log
+
+    def __call__(self):
+        keys = self.source()
+        self.log.masks.append(InputLog.mask(keys))
+        return keys
+
+class ReplayInput:
+    def __init__(self, log):
+        """Feed an input log's key states back one simulation step at a time"""
+        self.masks = log.masks
+        self.states = [HeldKeys(key for bit, key in enumerate(INPUT_LOG_KEYS) if mask & (1 << bit)) for mask in range(256)]
+        self.index = 0
+
+    def __call__(self):
+        if self.index >= len(self.masks):
+            return self.states[0]
+        mask = self.masks[self.index]
+        self.index += 1
+        return self.states[mask]
+
+class SimulationBatch:
+    SCORE_TIMES = (5, 10, 15, 20)  # Completion times, in seconds, that earn the matching score
+    SCORES = (100, 80, 60, 40)
+    LATE_SCORE = 20
+
+    def __init__(self, size, cell_size=GRID_SIZE, speed=MOVEMENT_SPEED):
+        """Game rules for many sessions at once, kept in NumPy arrays and independent of the display"""
+        self.size = size
+        self.cell_size = cell_size
+        self.speed = speed
+        # Each session's level, framed by a ring of wall and padded with wall to the largest level loaded
+        self.walls = np.ones((size, 3, 3), dtype=bool)
+        self.pos = np.zeros((size, 2))
+        self.previous_pos = np.zeros((size, 2))
+        self.exit_pos = np.zeros((size, 2))
+        self.level_time = np.zeros(size)
+        self.light_timer = np.zeros(size)
+        self.light_duration = np.zeros(size)
+        self.won = np.zeros(size, dtype=bool)
+        self.over = np.zeros(size, dtype=bool)
+
+    @staticmethod
+    def light_duration_for(level):
+        """Seconds of light a level starts with; shorter on each level"""
+        return max(10, 20 - (level * 2))
+
+    @classmethod
+    def score(cls, time_taken):
+        """Score for completing a level in the given time, elementwise for arrays"""
+        time_taken = np.asarray(time_taken)
+        return np.select([time_taken < limit for limit in cls.SCORE_TIMES], cls.SCORES, cls.LATE_SCORE)
+
+    def load_level(self, index, walls, start, exit_pos, light_duration):
+        """Start a session on a level: its wall grid, start and exit in pixels, and light in seconds"""
+        rows, cols = walls.shape
+        height, width = self.walls.shape[1:]
+        if rows + 2 > height or cols + 2 > width:
+            grown = np.ones((self.size, max(height, rows + 2), max(width, cols + 2)), dtype=bool)
+            grown[:, :height, :width] = self.walls
+            self.walls = grown
+        self.walls[index] = True
+        self.walls[index, 1:rows + 1, 1:cols + 1] = walls
+        
+        self.pos[index] = start
+        self.previous_pos[index] = start
+        self.exit_pos[index] = exit_pos
+        self.level_time[index] = 0
+        self.light_timer[index] = 0
+        self.light_duration[index] = light_duration
+        self.won[index] = False
+        self.over[index] = False
+
+    def step(self, masks, dt=SIMULATION_STEP):
+        """Advance every running session by one step, given InputLog key bitmasks; returns (moved, expired) flags"""
+        active = ~self.over
+        
+        # Light timer; a session whose light has run out is over after this step
+        lit = active & (self.light_timer < self.light_duration)
+        self.light_timer[lit] += dt
+        self.level_time[lit] += dt
+        expired = active & ~lit
+        self.over |= expired
+        
+        # Exit check, from where the player stood before moving
+        offset = self.pos - self.exit_pos
+        reached = active & (np.hypot(offset[:, 0], offset[:, 1]) < self.cell_size // 2)
+        self.won |= reached
+        self.over |= reached
+        
+        # Movement: the direction from the held keys, at a fixed speed even diagonally
+        self.previous_pos[active] = self.pos[active]
+        keys = (np.asarray(masks, dtype=np.uint8)[:, np.newaxis] >> np.arange(len(INPUT_LOG_KEYS))) & 1
+        up, down, left, right = (keys[:, bit] | keys[:, bit + 4] for bit in range(4))
+        move = np.column_stack((right.astype(float) - left, down.astype(float) - up))
+        length = np.hypot(move[:, 0], move[:, 1])
+        moving = active & (length > 0)
+        move[moving] *= self.speed / length[moving, np.newaxis]
+        new_pos = self.pos + move
+        
+        # The player's box covers at most two cells on each axis; check its corner cells
+        half, box = self.cell_size // 4, self.cell_size // 2
+        corner = np.trunc(new_pos - half).astype(np.int64)  # Truncates like pygame.Rect
+        low = np.clip(corner // self.cell_size + 1, 0, None)
+        high = (corner + box - 1) // self.cell_size + 1
+        low[:, 0] = np.minimum(low[:, 0], self.walls.shape[2] - 1)
+        low[:, 1] = np.minimum(low[:, 1], self.walls.shape[1] - 1)
+        high[:, 0] = np.clip(high[:, 0], 0, self.walls.shape[2] - 1)
+        high[:, 1] = np.clip(high[:, 1], 0, self.walls.shape[1] - 1)
+        sessions = np.arange(self.size)
+        blocked = (
+            self.walls[sessions, low[:, 1], low[:, 0]] | self.walls[sessions, low[:, 1], high[:, 0]] |
+            self.walls[sessions, high[:, 1], low[:, 0]] | self.walls[sessions, high[:, 1], high[:, 0]]
+        )
+        moved = moving & ~blocked
+        self.pos[moved] = new_pos[moved]
+        return moved, expired
+
+def use_headless_drivers():
+    """Route SDL video and audio to the dummy drivers; call before the display is created"""
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+class RuntimeContext:
+    current = None  # The one context per process, created on first use
+
+    def __init__(self, headless=False):
+        """Display, mixer, fonts and assets set up once per process and shared by every game"""
+        self.created = time.perf_counter()
+        self.headless = headless  # Fixed for the life of the context; SDL picks its drivers once
+        if headless:
+            use_headless_drivers()
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption(SCREEN_TITLE)
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        
+        self.assets = AssetManager()
+        self.assets.prefetch_image(PLAY_IMAGE)  # Decodes while fonts and the title text are prepared
+        self.assets.prefetch_sound(GUIDANCE_SOUND)
+        self.fonts = {}
+        self.text_caches = {}
+        self.first_frame_time = None  # Seconds from context creation to the first game frame
+
+    @classmethod
+    def get(cls, headless=False):
+        """Return the process-wide context, creating it on the first call; headless must match the existing one"""
+        if cls.current is None:
+            cls.current = cls(headless)
+        elif cls.current.headless != headless:
+            mode = "headless" if cls.current.headless else "windowed"
+            raise ValueError(f"A {mode} runtime context already exists; close() it before asking for headless={headless}")
+        return cls.current
+
+    def font(self, size):
+        """Default font at a size, loaded once"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(None, size)
+            self.fonts[size] = font
+        return font
+
+    def text_cache(self, size):
+        """Shared cache of rendered strings for the default font at a size"""
+        cache = self.text_caches.get(size)
+        if cache is None:
+            cache = TextCache(self.font(size))
+            self.text_caches[size] = cache
+        return cache
+
+    def mark_first_frame(self):
+        """Record time to the first game frame, once per process; returns it in seconds"""
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - self.created
+        return self.first_frame_time
+
+    def close(self):
+        self.assets.shutdown()
+        GuidanceField.shutdown()
+        pygame.quit()
+        RuntimeContext.current = None
+
+class EchoingDepthsGame:
+    def __init__(self, starting_level=1, seed=None, input_source=None, headless=False, max_frames=None,
+                 profiler=None, trace_path=None, render_fps=RENDER_FPS, level_pack=None,
+                 seed_catalogue=None, context=None, record_path=None, level_seeds=None, level_digests=None):
+        self.created = time.perf_counter()
+        self.time_to_first_frame = None  # Seconds from construction to the first presented frame
+        
+        # Display, fonts, mixer and assets outlive individual games
+        self.context = context or RuntimeContext.get(headless)
+        self.screen = self.context.screen
         self.clock = pygame.time.Clock()
         
+        # Simulation setup: level seeds, input and how long to run
+        if record_path is not None and seed is None:
+            seed = random.randrange(2 ** 31)  # Recorded sessions need a seed to be replayable
+        self.seed = seed  # Base seed for maze generation; None picks a fresh maze every time
+        self.level_seeds = dict(level_seeds or {})  # Seed each level was built with, fixed on first use
+        self.expected_digests = dict(level_digests or {})  # Levels a replay must match, from its input log
+        self.level_digests = {}  # Digest of each level played so far
+        self.input_source = input_source or pygame.key.get_pressed
+        self.headless = headless  # Skip real-time waits when nobody is watching
+        self.max_frames = max_frames
+        self.steps = 0  # Simulation steps run so far
+        self.timed_out = False  # The light ran out; run() shows the game over screen after its last frame
+        
+        # Input recording for deterministic replays
+        self.record_path = record_path
+        self.input_log = None
+        if record_path is not None:
+            self.input_log = InputLog(starting_level, seed, self.level_seeds, self.level_digests)
+            self.input_source = InputRecorder(self.input_source, self.input_log)
+        
+        # Authored levels from a level pack take precedence over generated ones
+        self.level_pack = level_pack if level_pack is not None else LevelPack.open_default()
+        self.seed_catalogue = seed_catalogue if seed_catalogue is not None else SeedCatalogue.open_default()
+        
+        # Frame instrumentation; disabled unless a profiler or trace file is given, or toggled in game
+        self.profiler = profiler or FrameProfiler(enabled=trace_path is not None)
+        self.trace_path = trace_path  # Profiler trace written when play() returns
+        
         # Game progression
         self.current_level = starting_level
         self.max_levels = 5  # Increased number of levels
         
-        # Game state
-        self.wall_list = []
-        self.player_pos = None
-        self.exit_pos = None
+        # Game state; positions, timers and results live in a one-session simulation batch
+        self.sim = SimulationBatch(1)
+        self.maze = None
+        self.wall_grid = None
+        self.guidance = None
+        
+        # Font for level display, with cached renders for the HUD
+        self.font = self.context.font(36)
+        self.text_cache = self.context.text_cache(36)
+        self.timer_glyphs = GlyphAtlas(self.font, (255, 255, 255))
         
-        # Font for level display
-        self.font = pygame.font.Font(None, 36)
+        # Sound guidance; the decoded sound is shared across games
+        self.audio = AudioManager(self.context.assets)
         
         # Light engine with increasing darkness
         self.light_engine = LightEngine(SCREEN_WIDTH, SCREEN_HEIGHT, 
                                         darkness_level=self.current_level)
         
-        # Initialize level
-        self.setup_level()
-
-        self.light_timer = 0
-        self.light_duration = max(10, 20 - (self.current_level * 2))  # Decrease light duration with each level
+        # Viewport over the world; everything in the level lives in world coordinates
+        self.camera = Camera((SCREEN_WIDTH, SCREEN_HEIGHT))
+        
+        # Screen regions to repaint each frame
+        self.dirty_rects = DirtyRectTracker(self.screen.get_rect())
         
-        # Game result tracking
-        self.game_over = False
-        self.game_won = False
+        # Initialize level; later levels are prepared in the background
+        self.preloader = LevelPreloader(self.build_level)
+        self.setup_level()
 
         # Particle system for visual effects
-        self.particles = []
+        self.particles = ParticlePool(seed=seed)
 
-        # Track start time
-        self.start_time = time.time()
+        # Simulation clock, decoupled from rendering
+        self.scheduler = FixedStepScheduler()
+        self.render_fps = render_fps
+        self.frame_time = 0  # Real seconds the last rendered frame took
         
         # Score tracking
         self.total_score = 0
     
-    def create_wall_texture(self, wall_rect):
-        """Create a textured surface for walls"""
-        texture = pygame.Surface((GRID_SIZE, GRID_SIZE))
+    def level_seed(self, level=None):
+        """Seed for a level's maze and textures, from the seed catalogue when it covers the level"""
+        level = self.current_level if level is None else level
+        if level not in self.level_seeds:
+            self.level_seeds[level] = self.pick_level_seed(level)
+        return self.level_seeds[level]
+
+    def pick_level_seed(self, level):
+        if self.seed_catalogue is not None:
+            seed = self.seed_catalogue.pick(level, self.maze_dimensions(level), self.seed)
+            if seed is not None:
+                return seed
+        if self.seed is None:
+            return None
+        return self.seed + level
+
+    @classmethod
+    def from_log(cls, log, **kwargs):
+        """Headless game that replays an input log one step per frame"""
+        return cls(starting_level=log.starting_level, seed=log.seed, level_seeds=log.level_seeds,
+                   level_digests=log.level_digests, input_source=ReplayInput(log), headless=True,
+                   max_frames=log.steps, **kwargs)
+
+    def simulation_state(self):
+        """Level, player position, timers, score and step count, for comparing replays"""
+        return (self.current_level, self.player_pos.x, self.player_pos.y, self.level_time, self.light_timer,
+                self.total_score, self.steps)
+
+    def maze_dimensions(self, level=None):
+        """Maze size in grid cells for a level, the current one by default; the camera scrolls over it"""
+        return MazeGenerator.level_dimensions(self.current_level if level is None else level)
+
+    def build_level(self, level):
+        """Load or generate a level's maze, occupancy grid and baked walls; safe to run on a worker thread"""
+        if self.level_pack is not None and level in self.level_pack:
+            maze, (start_col, start_row), (exit_col, exit_row), seed = self.level_pack.load(level)
+            if seed is None:
+                seed = self.level_seed(level)
+        else:
+            maze_width, maze_height = self.maze_dimensions(level)
+            seed = self.level_seed(level)
+            maze = MazeGenerator.generate_grid(
+                width=maze_width, 
+                height=maze_height, 
+                complexity=level - 1,
+                seed=seed
+            )
+            (start_col, start_row), (exit_col, exit_row) = MazeGenerator.endpoints(maze_width, maze_height)
+        
+        wall_grid = WallGrid(maze == MAZE_WALL)  # Occupancy grid for collision queries
         
-        # Base wall color with variation
-        base_color = (random.randint(40, 60), random.randint(40, 60), random.randint(40, 60))
-        texture.fill(base_color)
+        # Every wall points at one of a small, fixed set of seeded texture variants
+        wall_atlas = WallTextureAtlas(seed=seed)
+        chunks = ChunkedLevel(wall_grid, wall_atlas, seed)
+        
+        player_pos = pygame.Vector2(
+            start_col * GRID_SIZE + GRID_SIZE // 2, 
+            start_row * GRID_SIZE + GRID_SIZE // 2
+        )
+        exit_pos = pygame.Vector2(
+            exit_col * GRID_SIZE + GRID_SIZE // 2, 
+            exit_row * GRID_SIZE + GRID_SIZE // 2
+        )
         
-        # Add some noise/texture
-        for _ in range(50):
-            x = random.randint(0, GRID_SIZE-1)
-            y = random.randint(0, GRID_SIZE-1)
-            shade = random.randint(-20, 20)
-            noise_color = tuple(max(0, min(255, base_color[i] + shade)) for i in range(3))
-            texture.set_at((x, y), noise_color)
+        guidance = GuidanceField(wall_grid.cells, (exit_col, exit_row))
+        visibility = VisibilityEngine(wall_grid)
         
-        return texture
+        return LevelData(level, maze, wall_grid, wall_atlas, chunks, player_pos, exit_pos, guidance, visibility)
 
     def setup_level(self):
-        """Initialize a new game level with more complex generation"""
-        max_maze_width = SCREEN_WIDTH // GRID_SIZE
-        max_maze_height = SCREEN_HEIGHT // GRID_SIZE
+        """Initialize a new game level, swapping in the preloaded one when it is ready"""
+        level_data = self.preloader.take(self.current_level)
+        expected = self.expected_digests.get(self.current_level)
+        if expected is not None and expected != level_data.digest:
+            raise ValueError(f"Level {self.current_level} differs from the recording; "
+                             "replay with the level pack and seed catalogue it was recorded with")
+        self.level_digests[self.current_level] = level_data.digest
         
-        maze_width = min(20 + (self.current_level * 2), max_maze_width)
-        maze_height = min(15 + self.current_level, max_maze_height)
+        self.maze = level_data.maze
+        self.wall_grid = level_data.wall_grid
+        self.wall_atlas = level_data.wall_atlas
+        self.chunks = level_data.chunks
+        self.guidance = level_data.guidance
+        self.light_engine.set_visibility(level_data.visibility)
+        self.camera.set_world(self.chunks.world_rect)
         
-        maze = MazeGenerator.generate_maze(
-            width=maze_width, 
-            height=maze_height, 
-            complexity=self.current_level - 1
-        )
+        # Start preparing the next level while this one is played
+        if self.current_level < self.max_levels:
+            self.preloader.request(self.current_level + 1)
         
-        self.wall_list = []
-        self.wall_textures = []  # Store wall textures
+        # The whole screen changes with the level
+        self.dirty_rects.invalidate()
         
-        for row_index, row in enumerate(maze):
-            for col_index, cell in enumerate(row):
-                x = col_index * GRID_SIZE
-                y = row_index * GRID_SIZE
-                
-                if cell == '#':
-                    wall_rect = pygame.Rect(x, y, GRID_SIZE, GRID_SIZE)
-                    self.wall_list.append(wall_rect)
-                    # Create and store a unique texture for each wall
-                    self.wall_textures.append(self.create_wall_texture(wall_rect))
-                
-                elif cell == 'P':
-                    self.player_pos = pygame.Vector2(
-                        x + GRID_SIZE // 2, 
-                        y + GRID_SIZE // 2
-                    )
-                
-                elif cell == 'E':
-                    self.exit_pos = pygame.Vector2(
-                        x + GRID_SIZE // 2, 
-                        y + GRID_SIZE // 2
-                    )
-        
-        # Reset start time for the new level
-        self.start_time = time.time()
+        # Restart the rules on the new level, with less light each level
+        self.sim.load_level(0, self.wall_grid.cells, level_data.player_pos, level_data.exit_pos,
+                            SimulationBatch.light_duration_for(self.current_level))
+        self.render_pos = pygame.Vector2(self.player_pos)
+        self.camera.follow(self.render_pos)
     
     def create_player_particle(self):
         """Create particles around the player for a glowing effect"""
-        for _ in range(2):
-            particle = {
-                'pos': pygame.Vector2(
-                    self.player_pos.x + random.uniform(-10, 10),
-                    self.player_pos.y + random.uniform(-10, 10)
-                ),
-                'velocity': pygame.Vector2(
-                    random.uniform(-1, 1),
-                    random.uniform(-1, 1)
-                ),
-                'color': (200, 200, 255, 100),
-                'size': random.uniform(2, 5),
-                'lifetime': random.uniform(0.5, 1.5)
-            }
-            self.particles.append(particle)
+        self.particles.emit(self.player_pos, 2)
     
-    def update_particles(self):
-        """Update and render particles"""
-        for particle in self.particles[:]:
-            particle['pos'] += particle['velocity']
-            particle['lifetime'] -= 1 / FPS
-            
-            if particle['lifetime'] <= 0:
-                self.particles.remove(particle)
+    def update_particles(self, dt=SIMULATION_STEP):
+        """Update particles"""
+        self.particles.update(dt)
     
     def draw_particles(self):
         """Draw particles on screen"""
-        for particle in self.particles:
-            pygame.draw.circle(
-                self.screen, 
-                particle['color'], 
-                (int(particle['pos'].x), int(particle['pos'].y)), 
-                int(particle['size'])
-            )
+        self.particles.draw(self.screen, self.camera.offset)
 
-    def handle_movement(self):
-        """Handle player movement with collision detection"""
-        keys = pygame.key.get_pressed()
-        move_vector = pygame.Vector2(0, 0)
-        
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
-            move_vector.y -= MOVEMENT_SPEED
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
-            move_vector.y += MOVEMENT_SPEED
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            move_vector.x -= MOVEMENT_SPEED
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            move_vector.x += MOVEMENT_SPEED
-        
-        if move_vector.length() == 0:
-            return
-        
-        if move_vector.length() > 0:
-            move_vector = move_vector.normalize() * MOVEMENT_SPEED
-        
-        new_pos = self.player_pos + move_vector
-        
-        player_rect = pygame.Rect(
-            new_pos.x - GRID_SIZE//4, 
-            new_pos.y - GRID_SIZE//4, 
-            GRID_SIZE//2, 
-            GRID_SIZE//2
-        )
-        
-        if not any(player_rect.colliderect(wall) for wall in self.wall_list):
-            self.player_pos = new_pos
-            # Create player movement particles
-            self.create_player_particle()
-    
-    def check_level_completion(self):
-        """Check if the player has reached the exit"""
-        if self.player_pos.distance_to(self.exit_pos) < GRID_SIZE // 2:
-            self.game_won = True
-            self.game_over = True
-            print(f"Level {self.current_level} completed!")
+    @property
+    def player_pos(self):
+        return pygame.Vector2(self.sim.pos[0].tolist())
+
+    @player_pos.setter
+    def player_pos(self, pos):
+        self.sim.pos[0] = pos
+
+    @property
+    def previous_pos(self):
+        """Player position before the last step"""
+        return pygame.Vector2(self.sim.previous_pos[0].tolist())
+
+    @property
+    def exit_pos(self):
+        return pygame.Vector2(self.sim.exit_pos[0].tolist())
+
+    @property
+    def level_time(self):
+        return float(self.sim.level_time[0])
+
+    @property
+    def light_timer(self):
+        return float(self.sim.light_timer[0])
+
+    @property
+    def light_duration(self):
+        return float(self.sim.light_duration[0])
+
+    @property
+    def game_over(self):
+        return bool(self.sim.over[0])
+
+    @property
+    def game_won(self):
+        return bool(self.sim.won[0])
 
     def display_level_completion(self):
         """Display level completion message with time taken and score"""
-        time_taken = time.time() - self.start_time
+        time_taken = self.level_time
         score = self.calculate_score(time_taken)
         self.total_score += score
         message = self.font.render(f"Level {self.current_level} Completed!", True, (255, 255, 255))
@@ -304,203 +1867,324 @@ class EchoingDepthsGame:
         self.screen.blit(total_score_message, (SCREEN_WIDTH // 2 - total_score_message.get_width() // 2, SCREEN_HEIGHT // 2 - total_score_message.get_height() // 2 + 60))
         
         pygame.display.flip()
-        pygame.time.wait(2000)  # Wait for 2 seconds
+        self.wait(2000)  # Wait for 2 seconds
+
+    def wait(self, milliseconds):
+        """Hold the current screen while keeping the window responsive; skipped when headless"""
+        if self.headless:
+            return
+        end = pygame.time.get_ticks() + milliseconds
+        while pygame.time.get_ticks() < end:
+            pygame.event.pump()
+            self.clock.tick(FPS)
 
     def display_game_over(self):
         """Display game over message"""
         message = self.font.render("Game Over! Time's up!", True, (255, 0, 0))
         self.screen.blit(message, (SCREEN_WIDTH // 2 - message.get_width() // 2, SCREEN_HEIGHT // 2 - message.get_height() // 2))
         pygame.display.flip()
-        pygame.time.wait(2000)  # Wait for 2 seconds
+        self.wait(2000)  # Wait for 2 seconds
 
     def calculate_score(self, time_taken):
         """Calculate score based on time taken"""
-        if time_taken < 5:
-            return 100
-        elif time_taken < 10:
-            return 80
-        elif time_taken < 15:
-            return 60
-        elif time_taken < 20:
-            return 40
-        else:
-            return 20
+        return int(SimulationBatch.score(time_taken))
 
     def draw_hud(self):
         """Draw the HUD with current level, score, and time"""
-        time_taken = time.time() - self.start_time
-        level_message = self.font.render(f"Level: {self.current_level}", True, (255, 255, 255))
-        score_message = self.font.render(f"Score: {self.total_score}", True, (255, 255, 255))
-        time_message = self.font.render(f"Time: {time_taken:.2f}", True, (255, 255, 255))
+        time_taken = self.level_time
+        level_message = self.text_cache.render(f"Level: {self.current_level}", (255, 255, 255))
+        score_message = self.text_cache.render(f"Score: {self.total_score}", (255, 255, 255))
+        time_message = self.text_cache.render("Time: ", (255, 255, 255))
         
         self.screen.blit(level_message, (10, 10))
         self.screen.blit(score_message, (10, 40))
         self.screen.blit(time_message, (10, 70))
+        self.timer_glyphs.draw(self.screen, f"{time_taken:.2f}", (10 + time_message.get_width(), 70))
+
+    def update_guidance(self, pos):
+        """Steer the sound guidance from a player position"""
+        # Sound guidance mechanics: louder the shorter the path through the maze to the exit
+        distance_to_exit = self.guidance.distance_at(pos)
+        max_distance = self.guidance.max_distance * GRID_SIZE
+        if distance_to_exit is None:
+            volume = 0
+        else:
+            volume = max(0, min(1, 1 - (distance_to_exit / max_distance)))
+        
+        # Pan towards the side the path turns to next
+        pan = 0
+        waypoint = self.guidance.next_waypoint(pos)
+        if waypoint is not None and waypoint != pos:
+            pan = (waypoint - pos).normalize().x * AUDIO_MAX_PAN
+        
+        self.audio.update_guidance(volume, pan)
+
+    def exit_rect(self):
+        """The exit square in world coordinates, pulsing over time"""
+        pulse = math.sin(pygame.time.get_ticks() * 0.01) * 20
+        return pygame.Rect(
+            self.exit_pos.x - GRID_SIZE//4 + pulse, 
+            self.exit_pos.y - GRID_SIZE//4 + pulse, 
+            GRID_SIZE//2 - pulse*2, 
+            GRID_SIZE//2 - pulse*2
+        )
+
+    def exit_bounds(self):
+        """Screen area the exit can cover at any point of its pulse"""
+        size = GRID_SIZE//2 + 42
+        x, y = self.camera.to_screen(self.exit_pos)
+        return pygame.Rect(x - size // 2, y - size // 2, size, size)
+
+    def player_rect(self):
+        """Screen area covered by the player circle"""
+        radius = GRID_SIZE//3 + 1
+        x, y = self.camera.to_screen(self.render_pos)
+        return pygame.Rect(x - radius, y - radius, radius * 2, radius * 2)
+
+    def draw_level(self, regions):
+        """Repaint the level behind the given screen regions and draw the pulsing exit"""
+        # Restore the background and walls from the level's chunks
+        for region in regions:
+            self.chunks.draw(self.screen, region, self.camera.offset)
+
+        # Draw exit with pulsing effect
+        pygame.draw.rect(self.screen, EXIT_COLOR, self.exit_rect().move(-self.camera.view.x, -self.camera.view.y))
+
+    def draw_lighting(self):
+        """Cut the light effect out of the dark overlay and return the overlay"""
+        if not self.game_over and self.light_timer < self.light_duration:
+            return self.light_engine.render_overlay(self.camera.to_screen(self.render_pos), self.render_pos)
+        self.light_engine.clear_light()
+        return self.light_engine.overlay
+
+    def draw_player(self):
+        """Draw player with glow"""
+        pygame.draw.circle(
+            self.screen, 
+            PLAYER_COLOR, 
+            self.camera.to_screen(self.render_pos), 
+            GRID_SIZE//3
+        )
+
+    def advance_level(self):
+        """Move on to the next level; returns False once every level is completed"""
+        self.display_level_completion()
+        self.current_level += 1
+        if self.current_level > self.max_levels:
+            print(f"Congratulations! You've completed all levels with a total score of {self.total_score}!")
+            return False
+
+        self.setup_level()
+        self.light_engine.set_darkness_level(self.current_level)
+        self.scheduler.reset()
+        self.clock.tick()  # Don't count the completion screen as frame time
+        return True
 
     def play(self):
         """Main game loop"""
-        running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return self.total_score
-
-            if not self.game_over:
-                # Update light timer
-                if self.light_timer < self.light_duration:
-                    self.light_timer += 1 / FPS
-
-                    # Sound guidance mechanics
-                    distance_to_exit = self.player_pos.distance_to(self.exit_pos)
-                    max_distance = SCREEN_WIDTH
-                    volume = max(0, min(1, 1 - (distance_to_exit / max_distance)))
-                    
-                    self.light_engine.buzz_sound.set_volume(volume)
-                    self.light_engine.buzz_sound.play(-1)
-                else:
-                    self.light_engine.buzz_sound.stop()
-                    self.game_over = True
-                    self.display_game_over()
-                    running = False
-
-                # Check for level completion
-                self.check_level_completion()
-
-                # Handle player movement
-                self.handle_movement()
-
-                # Update particles
-                self.update_particles()
-
-            # Clear screen with gradient background
-            for y in range(SCREEN_HEIGHT):
-                color = (10, 10, 20 + y // 3)
-                pygame.draw.line(self.screen, color, (0, y), (SCREEN_WIDTH, y))
-
-            # Draw walls with unique textures
-            for wall, texture in zip(self.wall_list, self.wall_textures):
-                # Blit the textured surface onto the screen
-                self.screen.blit(texture, wall)
-
-            # Draw exit with pulsing effect
-            pulse = math.sin(pygame.time.get_ticks() * 0.01) * 20
-            exit_rect = pygame.Rect(
-                self.exit_pos.x - GRID_SIZE//4 + pulse, 
-                self.exit_pos.y - GRID_SIZE//4 + pulse, 
-                GRID_SIZE//2 - pulse*2, 
-                GRID_SIZE//2 - pulse*2
-            )
-            pygame.draw.rect(self.screen, EXIT_COLOR, exit_rect)
-
-            # Create dark overlay
-            dark_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            dark_overlay.fill(DARK_OVERLAY_COLOR)
-
-            # Create and apply light effect
-            if not self.game_over and self.light_timer < self.light_duration:
-                light_surface = self.light_engine.create_light_surface(
-                    (int(self.player_pos.x), int(self.player_pos.y))
-                )
-                dark_overlay.blit(light_surface, (0, 0), special_flags=pygame.BLEND_RGBA_SUB)
-
-            # Draw player with glow
-            pygame.draw.circle(
-                self.screen, 
-                PLAYER_COLOR, 
-                (int(self.player_pos.x), int(self.player_pos.y)), 
-                GRID_SIZE//3
-            )
+        try:
+            return self.run()
+        finally:
+            self.audio.stop_guidance()
+            self.preloader.shutdown()
+            if self.trace_path:
+                self.profiler.export(self.trace_path)
+            if self.record_path:
+                self.input_log.final_state = self.simulation_state()
+                self.input_log.write(self.record_path)
+
+    def simulate(self, dt):
+        """Advance the game rules by one fixed step; returns False once the light has run out"""
+        self.steps += 1
+        with self.profiler.phase('movement'):
+            # Light timer, exit check and movement all run in the simulation core
+            keys = self.input_source()
+            moved, expired = self.sim.step([InputLog.mask(keys)], dt)
+            running = not expired[0]
+            
+            if running:
+                self.update_guidance(self.previous_pos)
+            else:
+                self.audio.stop_guidance()
+                self.timed_out = True
+            if self.game_won:
+                print(f"Level {self.current_level} completed!")
+            if moved[0]:
+                # Create player movement particles
+                self.create_player_particle()
+
+        with self.profiler.phase('particles'):
+            self.update_particles(dt)
+        return running
 
-            # Draw particles
+    def render(self):
+        """Repaint only what changed since the last frame and push those regions to the display"""
+        profiler = self.profiler
+        with profiler.phase('compositing'):
+            # Scroll what is already on screen and repaint only the strip the camera uncovered
+            previous_offset = self.camera.offset
+            if self.camera.follow(self.render_pos):
+                offset = self.camera.offset
+                self.dirty_rects.scroll(self.screen, previous_offset[0] - offset[0], previous_offset[1] - offset[1])
+        with profiler.phase('lighting'):
+            dark_overlay = self.draw_lighting()
+
+        with profiler.phase('compositing'):
+            # Everything drawn this frame; the tracker adds what was drawn last frame
+            tracker = self.dirty_rects
+            tracker.add(self.light_engine.light_rect)
+            tracker.add(self.player_rect())
+            tracker.add(self.exit_bounds())
+            particle_bounds = self.particles.bounds()
+            if particle_bounds is not None:
+                tracker.add(particle_bounds.move(-self.camera.view.x, -self.camera.view.y))
+            tracker.add(HUD_RECT)
+            if profiler.show_overlay:
+                tracker.add(PROFILER_OVERLAY_RECT)
+            regions = tracker.regions()
+
+            self.draw_level(regions)
+            self.draw_player()
+        with profiler.phase('particles'):
             self.draw_particles()
 
+        with profiler.phase('compositing'):
             # Apply dark overlay
-            self.screen.blit(dark_overlay, (0, 0))
+            self.screen.blits([(dark_overlay, region, region) for region in regions], doreturn=False)
 
+        with profiler.phase('hud'):
             # Draw HUD
             self.draw_hud()
+        with profiler.phase('overlay'):
+            profiler.draw(self.screen, PROFILER_OVERLAY_RECT.move(10, 10).topleft, self.context.text_cache(PROFILER_FONT_SIZE))
 
+        with profiler.phase('compositing'):
             # Update display
-            pygame.display.flip()
-            self.clock.tick(FPS)
+            tracker.present(regions)
 
-            if self.game_won:
-                self.display_level_completion()
-                self.current_level += 1
-                if self.current_level > self.max_levels:
-                    print(f"Congratulations! You've completed all levels with a total score of {self.total_score}!")
-                    return self.total_score
-                else:
-                    self.setup_level()
-                    self.light_engine = LightEngine(SCREEN_WIDTH, SCREEN_HEIGHT, darkness_level=self.current_level)
-                    self.light_timer = 0
-                    self.light_duration = max(10, 20 - (self.current_level * 2))  # Decrease light duration with each level
-                    self.game_over = False
-                    self.game_won = False
-
-        return self.total_score 
-    
-def main():
-    """Main game initialization"""
-    pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption(SCREEN_TITLE)
-    clock = pygame.time.Clock()
-    font = pygame.font.Font(None, 36)
+    def run(self):
+        """Run frames until the player quits, the light runs out or every level is completed"""
+        profiler = self.profiler
+        running = True
+        frames = 0
+        self.clock.tick()  # Start timing from the first frame, not from construction
+        while running:
+            profiler.begin_frame()
+            with profiler.phase('events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return self.total_score
+                    if event.type == pygame.KEYDOWN and event.key == PROFILER_TOGGLE_KEY:
+                        profiler.toggle_overlay()
+                        self.dirty_rects.invalidate()
+
+            # Headless runs take exactly one step per frame, as fast as the machine allows
+            steps = 1 if self.headless else self.scheduler.advance(self.frame_time)
+            for _ in range(steps):
+                if self.game_over:
+                    break
+                running = self.simulate(self.scheduler.step)
+
+            # Draw the player between the last two steps
+            alpha = 1 if self.headless else self.scheduler.alpha
+            self.render_pos = self.previous_pos.lerp(self.player_pos, min(1, alpha))
+
+            self.render()
+            profiler.end_frame()
+            if self.time_to_first_frame is None:
+                self.time_to_first_frame = time.perf_counter() - self.created
+                self.context.mark_first_frame()
+            self.frame_time = self.clock.tick(0 if self.headless else self.render_fps) / 1000
+
+            if self.game_won and not self.advance_level():
+                return self.total_score
+
+            frames += 1
+            if self.max_frames is not None and frames >= self.max_frames:
+                break
+
+        # Outside any frame, so the screen and its wait never count as simulation or frame time
+        if self.timed_out:
+            self.display_game_over()
+        return self.total_score
+
+def main(record_dir=None):
+    """Main game initialization; with record_dir, every game's input is logged there for replay"""
+    context = RuntimeContext.get()
+    screen = context.screen
+    font = context.font(36)
+    text_cache = context.text_cache(36)
+
+    # Render texts while the context decodes the play image in the background
+    title_text = font.render(SCREEN_TITLE, True, (255, 255, 255))
+    start_text = font.render("Press SPACE to Start", True, (200, 200, 200))
 
     # Load assets
     try:
-        play_image = pygame.image.load(os.path.join('assets', 'play.png'))
-    except pygame.error:
+        play_image = context.assets.image(PLAY_IMAGE, alpha=True)
+    except (pygame.error, FileNotFoundError):
         print("Could not load play image. Using a placeholder.")
         play_image = pygame.Surface((200, 100))
         play_image.fill((100, 100, 100))
 
-    # Render texts
-    title_text = font.render(SCREEN_TITLE, True, (255, 255, 255))
-    start_text = font.render("Press SPACE to Start", True, (200, 200, 200))
-
     # Initial game state
     game_state = STATE_LOADING
     total_score = 0  # Track total score across game sessions
 
     running = True
+    redraw = True
+    startup_unreported = True  # Time to first frame is printed after the first game
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    if game_state in [STATE_LOADING, STATE_GAME_OVER]:
-                        # Start a new game
-                        game = EchoingDepthsGame()
-                        game.play()
-                        
-                        # Update total score
-                        total_score += game.total_score
-                        
-                        # Always go to game over screen after game ends
-                        game_state = STATE_GAME_OVER
-
-        if game_state == STATE_LOADING:
-            screen.fill(BACKGROUND_COLOR)
-            screen.blit(play_image, ((SCREEN_WIDTH - play_image.get_width()) // 2, (SCREEN_HEIGHT - play_image.get_height()) // 2))
-            screen.blit(title_text, ((SCREEN_WIDTH - title_text.get_width()) // 2, 50))
-            screen.blit(start_text, ((SCREEN_WIDTH - start_text.get_width()) // 2, SCREEN_HEIGHT - 100))
-        elif game_state == STATE_GAME_OVER:
-            screen.fill(BACKGROUND_COLOR)
-            game_over_text = font.render("Game Over", True, (255, 0, 0))
-            final_score_text = font.render(f"Total Score: {total_score}", True, (255, 255, 255))
-            restart_text = font.render("Press SPACE to Restart", True, (200, 200, 200))
-            
-            screen.blit(game_over_text, ((SCREEN_WIDTH - game_over_text.get_width()) // 2, 50))
-            screen.blit(final_score_text, ((SCREEN_WIDTH - final_score_text.get_width()) // 2, SCREEN_HEIGHT // 2))
-            screen.blit(restart_text, ((SCREEN_WIDTH - restart_text.get_width()) // 2, SCREEN_HEIGHT - 100))
+        # Static screens are drawn once per state change, not every frame
+        if redraw:
+            if game_state == STATE_LOADING:
+                screen.fill(BACKGROUND_COLOR)
+                screen.blit(play_image, ((SCREEN_WIDTH - play_image.get_width()) // 2, (SCREEN_HEIGHT - play_image.get_height()) // 2))
+                screen.blit(title_text, ((SCREEN_WIDTH - title_text.get_width()) // 2, 50))
+                screen.blit(start_text, ((SCREEN_WIDTH - start_text.get_width()) // 2, SCREEN_HEIGHT - 100))
+            elif game_state == STATE_GAME_OVER:
+                screen.fill(BACKGROUND_COLOR)
+                game_over_text = text_cache.render("Game Over", (255, 0, 0))
+                final_score_text = text_cache.render(f"Total Score: {total_score}", (255, 255, 255))
+                restart_text = text_cache.render("Press SPACE to Restart", (200, 200, 200))
+                
+                screen.blit(game_over_text, ((SCREEN_WIDTH - game_over_text.get_width()) // 2, 50))
+                screen.blit(final_score_text, ((SCREEN_WIDTH - final_score_text.get_width()) // 2, SCREEN_HEIGHT // 2))
+                screen.blit(restart_text, ((SCREEN_WIDTH - restart_text.get_width()) // 2, SCREEN_HEIGHT - 100))
 
-        pygame.display.flip()
-        clock.tick(FPS)
+            pygame.display.flip()
+            redraw = False
+
+        # Sleep until something happens instead of polling at FPS
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            running = False
+        elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+            redraw = True
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                if game_state in [STATE_LOADING, STATE_GAME_OVER]:
+                    # Start a new game
+                    record_path = None
+                    if record_dir is not None:
+                        os.makedirs(record_dir, exist_ok=True)
+                        record_path = os.path.join(record_dir, time.strftime('session_%Y%m%d_%H%M%S.inputlog'))
+                    game = EchoingDepthsGame(context=context, record_path=record_path)
+                    game.play()
+                    if startup_unreported and context.first_frame_time is not None:
+                        print(f"First game frame {context.first_frame_time * 1000:.0f} ms after startup")
+                        startup_unreported = False
+                    
+                    # Update total score
+                    total_score += game.total_score
+                    
+                    # Always go to game over screen after game ends
+                    game_state = STATE_GAME_OVER
+                    redraw = True
 
-    pygame.quit()
+    context.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument('--record', metavar='DIR', help='save an input log of every game to DIR for replay.py')
+    main(parser.parse_args().record)
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""Convert the hand-authored maze_levels/maze_level_N.py modules into a level pack.
+
+Each module defines MAZE_N (rows of 1 = wall, 0 = floor) plus PLAYER_START_N
+and EXIT_POS_N as pixel positions. Modules without a MAZE_N are skipped, and
+so are their levels, which the game then generates instead:
+
+    python pack_levels.py --output maze_levels/levels.pack
+"""
+import argparse
+import glob
+import importlib.util
+import os
+import re
+
+from main import GRID_SIZE, LEVEL_ENCODING_BITS, LEVEL_ENCODING_UINT8, LEVEL_PACK_PATH, LevelPack
+
+def load_module_level(path):
+    """Return (level, grid, start, exit, seed) from one level module, or None if it defines no maze"""
+    level = int(re.search(r'(\d+)\.py$', path).group(1))
+    spec = importlib.util.spec_from_file_location(f'maze_level_{level}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    
+    maze = getattr(module, f'MAZE_{level}', None)
+    if maze is None:
+        return None
+    start = [coordinate // GRID_SIZE for coordinate in getattr(module, f'PLAYER_START_{level}')]
+    exit_cell = [coordinate // GRID_SIZE for coordinate in getattr(module, f'EXIT_POS_{level}')]
+    return level, maze, start, exit_cell, None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', default='maze_levels', help='directory holding maze_level_N.py modules')
+    parser.add_argument('--output', default=LEVEL_PACK_PATH, help='level pack to write')
+    parser.add_argument('--encoding', choices=['bits', 'uint8'], default='bits',
+                        help='one bit per cell (smallest) or one byte per cell (zero-copy loads)')
+    args = parser.parse_args()
+    
+    levels = []
+    for path in sorted(glob.glob(os.path.join(args.source, 'maze_level_*.py'))):
+        level = load_module_level(path)
+        if level is None:
+            print(f"Skipping {path}: no maze defined")
+            continue
+        levels.append(level)
+    
+    encoding = LEVEL_ENCODING_BITS if args.encoding == 'bits' else LEVEL_ENCODING_UINT8
+    LevelPack.write(args.output, sorted(levels, key=lambda level: level[0]), encoding)
+    print(f"Wrote {len(levels)} levels to {args.output}")
+
+if __name__ == "__main__":
+    main()
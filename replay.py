@@ -0,0 +1,47 @@
+"""Replay a recorded input log headless and check it reaches the recorded state.
+
+Logs come from EchoingDepthsGame(record_path=...) or `python main.py --record DIR`.
+The replay runs one simulation step per frame as fast as the machine allows,
+so a slow or buggy field session becomes a repeatable test case:
+
+    python replay.py session.inputlog --trace replay.csv
+"""
+import argparse
+import sys
+import time
+
+from main import SIMULATION_STEP, EchoingDepthsGame, FrameProfiler, InputLog
+
+STATE_FIELDS = ['level', 'x', 'y', 'level_time', 'light_timer', 'total_score', 'steps']
+
+def replay(path, trace_path=None):
+    """Replay a log; returns (recorded state, replayed state, wall-clock seconds)"""
+    log = InputLog.read(path)
+    profiler = FrameProfiler(enabled=trace_path is not None, history=max(1, log.steps))
+    game = EchoingDepthsGame.from_log(log, profiler=profiler, trace_path=trace_path)
+    start = time.perf_counter()
+    game.play()
+    return tuple(log.final_state), game.simulation_state(), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log', help='input log to replay')
+    parser.add_argument('--trace', help='write per-frame profiler timings to this CSV or JSON file')
+    args = parser.parse_args()
+
+    try:
+        recorded, replayed, elapsed = replay(args.log, args.trace)
+    except ValueError as error:
+        # An old log, or levels that are not the ones it was recorded on
+        print(f"Cannot replay {args.log}: {error}")
+        sys.exit(2)
+    steps = recorded[-1]
+    print(f"Replayed {steps} steps in {elapsed:.2f}s ({steps * SIMULATION_STEP / max(elapsed, 1e-9):.1f}x real time)")
+    mismatches = [(name, want, got) for name, want, got in zip(STATE_FIELDS, recorded, replayed) if want != got]
+    for name, want, got in mismatches:
+        print(f"  {name}: recorded {want}, replayed {got}")
+    print("State mismatch" if mismatches else "State matches the recording")
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Checks for DirtyRectTracker.scroll shifting last frame's regions with the screen."""
+import pygame
+
+from main import DirtyRectTracker
+
+def scrolled_tracker(dx, dy, previous):
+    surface = pygame.Surface((100, 80))
+    tracker = DirtyRectTracker(surface.get_rect())
+    tracker.full = False  # As after the first present()
+    tracker.previous = list(previous)
+    tracker.scroll(surface, dx, dy)
+    return tracker
+
+def test_scroll_moves_previous_regions_and_adds_exposed_strips():
+    tracker = scrolled_tracker(3, -2, [pygame.Rect(10, 10, 5, 5), pygame.Rect(98, 0, 2, 2)])
+    moved, off_screen, left, bottom = tracker.previous
+    assert moved == pygame.Rect(13, 8, 5, 5)
+    assert not off_screen.width  # Scrolled off the right edge
+    assert left == pygame.Rect(0, 0, 3, 80)  # Uncovered on the left
+    assert bottom == pygame.Rect(0, 78, 100, 2)  # Uncovered at the bottom
+    assert tracker.push_all and not tracker.full
+
+def test_scroll_the_other_way_exposes_the_opposite_edges():
+    tracker = scrolled_tracker(-4, 5, [])
+    assert tracker.previous == [pygame.Rect(96, 0, 4, 80), pygame.Rect(0, 0, 100, 5)]
+
+def test_scroll_past_the_screen_repaints_everything():
+    tracker = scrolled_tracker(0, 80, [pygame.Rect(10, 10, 5, 5)])
+    assert tracker.full
+    assert tracker.regions() == [pygame.Rect(0, 0, 100, 80)]
+
+def test_scroll_during_a_full_repaint_does_nothing():
+    surface = pygame.Surface((100, 80))
+    tracker = DirtyRectTracker(surface.get_rect())
+    tracker.scroll(surface, 3, 3)
+    assert tracker.full and tracker.previous == [] and not tracker.push_all
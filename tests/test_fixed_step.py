@@ -0,0 +1,22 @@
+"""Checks for FixedStepScheduler's step payout, catch-up cap and interpolation fraction."""
+from main import FixedStepScheduler
+
+def test_elapsed_time_is_paid_out_in_whole_steps():
+    scheduler = FixedStepScheduler(step=0.25, max_steps=5)
+    assert scheduler.advance(0.125) == 0
+    assert scheduler.alpha == 0.5
+    assert scheduler.advance(0.5) == 2
+    assert scheduler.alpha == 0.5  # The remainder carries into the next frame
+
+def test_backlog_beyond_the_cap_is_dropped():
+    scheduler = FixedStepScheduler(step=0.25, max_steps=5)
+    assert scheduler.advance(10.125) == 5
+    assert scheduler.alpha == 0.5  # Only the part of a step survives, not the 35 steps behind
+    assert scheduler.advance(0.125) == 1
+
+def test_reset_discards_accumulated_time():
+    scheduler = FixedStepScheduler(step=0.25, max_steps=5)
+    scheduler.advance(0.2)
+    scheduler.reset()
+    assert scheduler.alpha == 0
+    assert scheduler.advance(0.2) == 0
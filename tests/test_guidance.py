@@ -0,0 +1,75 @@
+"""Checks for GuidanceField path distances, waypoints and the worker-process path for large mazes."""
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pygame
+import pytest
+
+import main
+from main import GuidanceField
+
+# A corridor that doubles back, with a floor cell walled off at (5, 1)
+WALLS = np.array([
+    [1, 1, 1, 1, 1, 1, 1],
+    [1, 0, 0, 0, 1, 0, 1],
+    [1, 1, 1, 0, 1, 1, 1],
+    [1, 0, 0, 0, 1, 1, 1],
+    [1, 1, 1, 1, 1, 1, 1],
+], dtype=bool)
+TARGET = (1, 3)
+EXPECTED = np.array([
+    [-1, -1, -1, -1, -1, -1, -1],
+    [-1, 6, 5, 4, -1, -1, -1],
+    [-1, -1, -1, 3, -1, -1, -1],
+    [-1, 0, 1, 2, -1, -1, -1],
+    [-1, -1, -1, -1, -1, -1, -1],
+])
+
+@pytest.fixture(autouse=True)
+def stop_worker():
+    yield
+    GuidanceField.shutdown()
+
+def center(col, row, size=10):
+    return pygame.Vector2((col + 0.5) * size, (row + 0.5) * size)
+
+def test_distances_follow_the_corridor():
+    field = GuidanceField(WALLS, TARGET, cell_size=10)
+    assert np.array_equal(field.distances, EXPECTED)
+    assert field.max_distance == 6
+    assert field.cell_distance(-1, 0) == -1 and field.cell_distance(0, 9) == -1
+
+def test_distance_at_is_in_pixels_and_none_without_a_path():
+    field = GuidanceField(WALLS, TARGET, cell_size=10)
+    assert field.distance_at(center(1, 1)) == 60
+    assert field.distance_at((11, 39)) == 0  # Anywhere inside the target cell
+    assert field.distance_at(center(0, 0)) is None  # Wall
+    assert field.distance_at(center(5, 1)) is None  # Walled off
+
+def test_next_waypoint_steps_towards_the_target():
+    field = GuidanceField(WALLS, TARGET, cell_size=10)
+    assert field.next_waypoint(center(1, 1)) == center(2, 1)
+    assert field.next_waypoint(center(3, 1)) == center(3, 2)
+    assert field.next_waypoint(center(*TARGET)) == center(*TARGET)
+    assert field.next_waypoint(center(5, 1)) is None
+
+def test_large_mazes_use_the_worker_process(monkeypatch):
+    monkeypatch.setattr(main, 'GUIDANCE_PROCESS_CELLS', 0)
+    field = GuidanceField(WALLS, TARGET, cell_size=10)
+    assert GuidanceField.process_pool is not None
+    assert np.array_equal(field.distances, EXPECTED)
+
+    GuidanceField.shutdown()
+    assert GuidanceField.process_pool is None
+
+def test_a_broken_worker_falls_back_to_this_process(monkeypatch, capsys):
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(main, 'GUIDANCE_PROCESS_CELLS', 0)
+    monkeypatch.setattr(GuidanceField, 'process_pool', BrokenPool())
+    field = GuidanceField(WALLS, TARGET, cell_size=10)
+    assert np.array_equal(field.distances, EXPECTED)
+    assert GuidanceField.process_pool is None
+    assert 'Computing path distances in this process' in capsys.readouterr().out
@@ -0,0 +1,33 @@
+"""Round-trip checks for the binary InputLog format."""
+import pygame
+import pytest
+
+from main import INPUT_LOG_MAGIC, HeldKeys, InputLog, ReplayInput
+
+def test_write_then_read_round_trips(tmp_path):
+    log = InputLog(2, 1234, {2: 99, 3: None}, {2: bytes(range(16))})
+    log.masks.extend([0] * 5 + [InputLog.mask(HeldKeys([pygame.K_UP, pygame.K_a]))] * 70000 + [1, 2, 1])
+    log.final_state = (2, 61.5, 140.25, 3.5, 3.5, 80, len(log.masks))
+    path = str(tmp_path / 'session.inputlog')
+    log.write(path)
+
+    loaded = InputLog.read(path)
+    assert (loaded.starting_level, loaded.seed) == (2, 1234)
+    assert loaded.level_seeds == {2: 99, 3: None}
+    assert loaded.level_digests == {2: bytes(range(16))}
+    assert loaded.masks == log.masks
+    assert loaded.final_state == log.final_state
+    assert loaded.steps == len(log.masks)
+
+def test_replay_input_returns_the_recorded_keys():
+    log = InputLog(1, 0)
+    log.masks.extend([InputLog.mask(HeldKeys([pygame.K_RIGHT])), 0])
+    replay = ReplayInput(log)
+    assert replay()[pygame.K_RIGHT] and not replay()[pygame.K_RIGHT]
+    assert not any(replay()[key] for key in (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT))
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'old.inputlog'
+    path.write_bytes(INPUT_LOG_MAGIC + b'\x01\x00' + bytes(64))
+    with pytest.raises(ValueError):
+        InputLog.read(str(path))
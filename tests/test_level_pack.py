@@ -0,0 +1,30 @@
+"""Round-trip checks for the memory-mapped LevelPack format."""
+import numpy as np
+import pytest
+
+from main import LEVEL_ENCODING_BITS, LEVEL_ENCODING_UINT8, LevelPack, MazeGenerator
+
+@pytest.mark.parametrize('encoding', [LEVEL_ENCODING_BITS, LEVEL_ENCODING_UINT8])
+def test_write_then_load_round_trips(tmp_path, encoding):
+    odd = MazeGenerator.generate_grid(23, 17, seed=3)  # Cell count not a multiple of 8
+    small = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=np.uint8)
+    path = str(tmp_path / 'levels.pack')
+    LevelPack.write(path, [(4, odd, (1, 1), (21, 15), 42), (1, small, (1, 1), (1, 1), None)], encoding=encoding)
+
+    pack = LevelPack(path)
+    assert pack.levels() == [1, 4]
+    assert 4 in pack and 2 not in pack
+
+    grid, start, exit_cell, seed = pack.load(4)
+    assert grid.shape == odd.shape and np.array_equal(grid, odd)
+    assert (start, exit_cell, seed) == ((1, 1), (21, 15), 42)
+
+    grid, start, exit_cell, seed = pack.load(1)
+    assert np.array_equal(grid, small)
+    assert seed is None
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / 'levels.pack'
+    path.write_bytes(b'NOPE' + bytes(16))
+    with pytest.raises(ValueError):
+        LevelPack(str(path))
@@ -0,0 +1,48 @@
+"""Checks for MazeGenerator grid shapes, size validation and connectivity."""
+from collections import deque
+
+import numpy as np
+import pytest
+
+from main import MAZE_FLOOR, MAZE_WALL, MazeGenerator
+
+@pytest.mark.parametrize('width, height', [(1, 5), (2, 5), (5, 1), (5, 2), (0, 0)])
+def test_too_small_mazes_are_rejected(width, height):
+    with pytest.raises(ValueError, match='at least 3'):
+        MazeGenerator.iter_rows(width, height)
+    with pytest.raises(ValueError, match='at least 3'):
+        MazeGenerator.generate_grid(width, height, seed=1)
+
+@pytest.mark.parametrize('width, height', [(3, 3), (3, 8), (8, 3), (22, 16)])
+def test_smallest_mazes_have_a_walled_border(width, height):
+    grid = MazeGenerator.generate_grid(width, height, seed=1)
+    assert grid.shape == (height, width)
+    assert (grid[0] == MAZE_WALL).all() and (grid[:, 0] == MAZE_WALL).all()
+    start, exit_cell = MazeGenerator.endpoints(width, height)
+    assert grid[start[1], start[0]] == MAZE_FLOOR
+    assert grid[exit_cell[1], exit_cell[0]] == MAZE_FLOOR
+
+def test_same_seed_same_maze():
+    assert np.array_equal(MazeGenerator.generate_grid(31, 21, 2, seed=7), MazeGenerator.generate_grid(31, 21, 2, seed=7))
+
+def reachable(grid, start):
+    """Floor cells reachable from a (column, row) start, by breadth-first search"""
+    seen = np.zeros(grid.shape, dtype=bool)
+    seen[start[1], start[0]] = True
+    queue = deque([(start[1], start[0])])
+    while queue:
+        row, col = queue.popleft()
+        for next_row, next_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if (0 <= next_row < grid.shape[0] and 0 <= next_col < grid.shape[1]
+                    and grid[next_row, next_col] == MAZE_FLOOR and not seen[next_row, next_col]):
+                seen[next_row, next_col] = True
+                queue.append((next_row, next_col))
+    return seen
+
+@pytest.mark.parametrize('width, height', [(3, 3), (22, 16), (23, 17), (60, 45)])
+@pytest.mark.parametrize('complexity', [0, 2, 5])
+def test_every_floor_cell_is_reachable(width, height, complexity):
+    for seed in range(5):
+        grid = MazeGenerator.generate_grid(width, height, complexity, seed=seed)
+        start, _ = MazeGenerator.endpoints(width, height)
+        assert np.array_equal(reachable(grid, start), grid == MAZE_FLOOR), (width, height, complexity, seed)
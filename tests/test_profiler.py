@@ -0,0 +1,36 @@
+"""Regression checks for FrameProfiler frame bookkeeping across F3 toggles."""
+from main import FrameProfiler
+
+def run_frame(profiler, toggle=False):
+    """One game frame as run() drives it, optionally pressing F3 during the events phase"""
+    profiler.begin_frame()
+    with profiler.phase('events'):
+        if toggle:
+            profiler.toggle_overlay()
+    with profiler.phase('movement'):
+        pass
+    profiler.end_frame()
+
+def test_overlay_off_then_on_records_no_stale_frame():
+    profiler = FrameProfiler()
+    run_frame(profiler, toggle=True)  # On mid-frame: the partial frame is skipped
+    run_frame(profiler)
+    assert len(profiler.frames) == 1
+
+    run_frame(profiler, toggle=True)  # Off mid-frame
+    run_frame(profiler, toggle=True)  # On mid-frame again
+
+    assert len(profiler.frames) == 1
+    assert profiler.frame_start is None
+    assert profiler.current == {}
+    assert not any(frame['over_budget'] for frame in profiler.frames)
+
+    run_frame(profiler)
+    assert len(profiler.frames) == 2
+    assert set(profiler.frames[-1]['phases']) == {'events', 'movement'}
+
+def test_always_enabled_profiler_keeps_timing_through_toggles():
+    profiler = FrameProfiler(enabled=True)
+    run_frame(profiler, toggle=True)
+    run_frame(profiler, toggle=True)
+    assert len(profiler.frames) == 2
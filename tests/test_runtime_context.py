@@ -0,0 +1,15 @@
+"""Checks that RuntimeContext.get keeps one display mode per context."""
+import pytest
+
+from main import RuntimeContext
+
+def test_get_refuses_a_different_display_mode():
+    context = RuntimeContext.get(headless=True)
+    try:
+        assert RuntimeContext.get(headless=True) is context
+        with pytest.raises(ValueError, match='headless runtime context already exists'):
+            RuntimeContext.get(headless=False)
+        assert RuntimeContext.current is context
+    finally:
+        context.close()
+    assert RuntimeContext.current is None
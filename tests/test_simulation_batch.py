@@ -0,0 +1,69 @@
+"""Checks for the SimulationBatch rules: wall collision, reaching the exit and the light running out."""
+import numpy as np
+import pygame
+
+from main import GRID_SIZE, MOVEMENT_SPEED, SIMULATION_STEP, HeldKeys, InputLog, SimulationBatch
+
+LEFT = InputLog.mask(HeldKeys([pygame.K_LEFT]))
+RIGHT = InputLog.mask(HeldKeys([pygame.K_d]))
+
+def open_room(rows, cols):
+    """Wall grid of an empty room inside a one-cell wall border"""
+    walls = np.ones((rows, cols), dtype=bool)
+    walls[1:-1, 1:-1] = False
+    return walls
+
+def cell_center(col, row):
+    return ((col + 0.5) * GRID_SIZE, (row + 0.5) * GRID_SIZE)
+
+def test_walls_stop_movement():
+    batch = SimulationBatch(2)
+    batch.load_level(0, open_room(5, 5), cell_center(1, 1), cell_center(3, 3), light_duration=60)
+    batch.load_level(1, open_room(4, 9), cell_center(1, 1), cell_center(7, 2), light_duration=60)
+    start = batch.pos.copy()
+
+    moved, expired = batch.step([LEFT, LEFT])
+    assert moved.all() and not expired.any()
+    assert np.allclose(batch.pos[:, 0], start[:, 0] - MOVEMENT_SPEED)
+
+    for _ in range(20):
+        batch.step([LEFT, LEFT])
+    # The player's box stops at the wall, a quarter cell from the player's center
+    assert (batch.pos[:, 0] - GRID_SIZE // 4 >= GRID_SIZE).all()
+    assert (batch.pos[:, 0] - GRID_SIZE // 4 - MOVEMENT_SPEED < GRID_SIZE).all()
+    assert np.array_equal(batch.pos[:, 1], start[:, 1])
+    moved, _ = batch.step([LEFT, LEFT])
+    assert not moved.any()
+    assert not batch.over.any()
+
+def test_reaching_the_exit_wins_and_stops_the_session():
+    batch = SimulationBatch(1)
+    batch.load_level(0, open_room(3, 5), cell_center(1, 1), cell_center(2, 1), light_duration=60)
+
+    for step in range(GRID_SIZE):
+        batch.step([RIGHT])
+        if batch.over[0]:
+            break
+    assert batch.won[0] and batch.over[0]
+    assert np.hypot(*(batch.pos[0] - batch.exit_pos[0])) < GRID_SIZE // 2
+
+    position, level_time = batch.pos.copy(), batch.level_time.copy()
+    moved, expired = batch.step([RIGHT])
+    assert not moved[0] and not expired[0]
+    assert np.array_equal(batch.pos, position) and np.array_equal(batch.level_time, level_time)
+
+def test_light_running_out_ends_the_session():
+    batch = SimulationBatch(2)
+    batch.load_level(0, open_room(5, 5), cell_center(1, 1), cell_center(3, 3), light_duration=SIMULATION_STEP * 3)
+    batch.load_level(1, open_room(5, 5), cell_center(1, 1), cell_center(3, 3), light_duration=60)
+
+    expirations = [batch.step([0, 0])[1] for _ in range(6)]
+    assert [bool(expired[0]) for expired in expirations].count(True) == 1
+    assert not any(expired[1] for expired in expirations)
+    assert batch.over[0] and not batch.won[0]
+    assert not batch.over[1]
+    assert batch.light_timer[0] >= batch.light_duration[0]
+    assert np.isclose(batch.level_time[1], SIMULATION_STEP * 6)
+
+def test_score_matches_completion_time():
+    assert SimulationBatch.score([1, 7, 12, 17, 30]).tolist() == [100, 80, 60, 40, 20]
@@ -0,0 +1,60 @@
+"""Checks for VisibilityEngine's block index and the light polygon it casts."""
+import math
+
+import numpy as np
+import pytest
+
+from main import GRID_SIZE, VISIBILITY_RING_RAYS, MazeGenerator, VisibilityEngine, WallGrid
+
+def open_room(rows, cols):
+    walls = np.ones((rows, cols), dtype=bool)
+    walls[1:-1, 1:-1] = False
+    return walls
+
+def exact_near(engine, origin, radius):
+    """The linear scan nearby_segments stands in for: every segment whose extent reaches the light's square"""
+    segments = engine.segments
+    return set(np.flatnonzero(
+        (np.minimum(segments[:, 0], segments[:, 2]) <= origin[0] + radius) &
+        (np.maximum(segments[:, 0], segments[:, 2]) >= origin[0] - radius) &
+        (np.minimum(segments[:, 1], segments[:, 3]) <= origin[1] + radius) &
+        (np.maximum(segments[:, 1], segments[:, 3]) >= origin[1] - radius)
+    ).tolist())
+
+@pytest.mark.parametrize('width, height, seed', [(22, 16, 1), (61, 41, 2), (9, 30, 3)])
+def test_nearby_segments_never_miss_a_wall_in_reach(width, height, seed):
+    engine = VisibilityEngine(WallGrid(MazeGenerator.generate_grid(width, height, seed=seed) == 1))
+    rng = np.random.default_rng(seed)
+    for _ in range(200):
+        origin = (rng.uniform(0, width * GRID_SIZE), rng.uniform(0, height * GRID_SIZE))
+        radius = float(rng.uniform(20, 250))
+        nearby = set(engine.nearby_segments(origin, radius).tolist())
+        assert exact_near(engine, origin, radius) <= nearby
+
+def test_open_room_sees_the_full_ring():
+    engine = VisibilityEngine(WallGrid(open_room(30, 30)))
+    polygon = np.array(engine.visible_polygon((620, 620), 100))
+    assert len(polygon) == VISIBILITY_RING_RAYS
+    assert np.allclose(np.hypot(polygon[:, 0], polygon[:, 1]), 100)
+
+def test_a_wall_clips_the_polygon():
+    walls = open_room(30, 30)
+    walls[15, 16] = True  # The cell east of the player's, whose west face is at x = 640
+    engine = VisibilityEngine(WallGrid(walls))
+    polygon = np.array(engine.visible_polygon((620, 620), 100))
+    lengths = np.hypot(polygon[:, 0], polygon[:, 1])
+    angles = np.arctan2(polygon[:, 1], polygon[:, 0])
+
+    # Rays are cast from the center of the player's sub-cell
+    origin_x = (620 // engine.subcell_size + 0.5) * engine.subcell_size
+    east = np.abs(angles) < 0.01
+    assert east.any() and np.allclose(lengths[east], 640 - origin_x)
+    west = np.abs(np.abs(angles) - math.pi) < 0.01
+    assert np.allclose(lengths[west], 100)
+    assert (lengths <= 100 + 1e-3).all()
+
+def test_polygon_is_reused_within_a_sub_cell():
+    engine = VisibilityEngine(WallGrid(open_room(10, 10)))
+    polygon = engine.visible_polygon((201, 201), 80)
+    assert engine.visible_polygon((201 + engine.subcell_size / 4, 201), 80) is polygon
+    assert engine.visible_polygon((201 + engine.subcell_size, 201), 80) is not polygon
@@ -0,0 +1,58 @@
+"""Checks for WallGrid point and segment queries, including cell boundaries and the grid edge."""
+import numpy as np
+import pytest
+
+from main import WallGrid
+
+# 10 px cells; nothing frames the grid, so its outside edge is where off-grid wall starts
+GRID = WallGrid(np.array([
+    [0, 1, 0, 0],
+    [1, 0, 0, 0],
+    [0, 0, 1, 0],
+    [0, 0, 0, 0],
+], dtype=bool), cell_size=10)
+
+@pytest.mark.parametrize('point, wall', [
+    ((5, 5), False),
+    ((15, 5), True),
+    ((10, 5), True),  # A point on a boundary belongs to the cell right of / below it
+    ((9.99, 5), False),
+    ((39.9, 39.9), False),
+    ((-0.1, 5), True),  # Outside the grid counts as wall
+    ((40, 5), True),
+    ((5, 40), True),
+])
+def test_is_wall_at(point, wall):
+    assert GRID.is_wall_at(*point) is wall
+
+@pytest.mark.parametrize('start, end, hit', [
+    ((0, 35), (39.9, 35), False),  # Along the open bottom row
+    ((10, 15), (30, 15), False),  # Starting exactly on a boundary, into open cells
+    ((9.99, 15), (30, 15), True),  # Starting just inside the wall cell
+    ((30, 15), (10, 15), False),  # Ending exactly on the wall cell's boundary
+    ((30, 15), (9.99, 15), True),
+    ((30, 0), (30, 39), False),  # Running along a column boundary with open cells right of it
+    ((20, 0), (20, 39), True),
+    ((15, 15), (15, 15), False),  # A point
+])
+def test_segments_on_cell_boundaries(start, end, hit):
+    assert GRID.segment_hits_wall(start, end) is hit
+
+def test_diagonal_through_a_corner_between_two_walls_is_blocked():
+    # (0, 0) and (1, 1) are open but only touch at a corner flanked by walls
+    assert GRID.segment_hits_wall((5, 5), (15, 15))
+    assert GRID.segment_hits_wall((15, 15), (5, 5))
+
+def test_diagonal_through_an_open_corner_is_clear():
+    assert not GRID.segment_hits_wall((25, 15), (35, 5))
+    assert not GRID.segment_hits_wall((35, 5), (25, 15))
+    assert not GRID.segment_hits_wall((5, 25), (15, 35))
+
+@pytest.mark.parametrize('start, end', [
+    ((-5, 35), (15, 35)),  # Starting off the grid
+    ((15, 35), (15, 45)),  # Ending off the grid
+    ((35, 25), (45, 35)),  # Leaving diagonally
+    ((-20, -20), (-10, -10)),  # Entirely off the grid
+])
+def test_segments_reaching_off_the_grid_hit_wall(start, end):
+    assert GRID.segment_hits_wall(start, end)
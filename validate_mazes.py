@@ -0,0 +1,102 @@
+"""Validate and profile seeded mazes in parallel and write a seed catalogue.
+
+Generates every seed in a range for each level across a process pool,
+checks that the exit is reachable from the start and measures shortest-path
+length, dead ends and branching factor. Solvable seeds are written to a
+catalogue the game picks its levels from:
+
+    python validate_mazes.py --levels 1-5 --seeds 2000 --keep 64
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from main import MAZE_WALL, SEED_CATALOGUE_PATH, GuidanceField, MazeGenerator, SeedCatalogue
+
+CHUNK_SEEDS = 100  # Seeds checked per task, so process overhead stays small next to maze work
+
+def maze_stats(grid, start, exit_cell):
+    """Solvability, shortest path in cells, dead ends and mean exits per junction of one maze"""
+    walls = grid == MAZE_WALL
+    path_length = GuidanceField.path_distances(walls, exit_cell)[start[1], start[0]]  # Already in a worker process
+
+    # Open neighbours of every floor cell
+    floor = np.pad(~walls, 1, constant_values=False)
+    exits = (floor[:-2, 1:-1].astype(np.int8) + floor[2:, 1:-1] + floor[1:-1, :-2] + floor[1:-1, 2:])[~walls]
+    junctions = exits[exits >= 3]
+
+    return {
+        'solvable': bool(path_length >= 0),
+        'path_length': int(path_length),
+        'dead_ends': int((exits == 1).sum()),
+        'branching': round(float(junctions.mean()), 3) if len(junctions) else 0.0
+    }
+
+def validate_seeds(level, seeds):
+    """Generate and measure one chunk of seeds for a level; runs in a worker process"""
+    width, height = MazeGenerator.level_dimensions(level)
+    start, exit_cell = MazeGenerator.endpoints(width, height)
+    results = []
+    for seed in seeds:
+        grid = MazeGenerator.generate_grid(width, height, complexity=level - 1, seed=seed)
+        results.append(dict(seed=seed, **maze_stats(grid, start, exit_cell)))
+    return results
+
+def validate_levels(levels, seeds, first_seed=0, workers=None):
+    """Check a seed range for every level across a process pool; returns {level: [stats, ...]} in seed order"""
+    results = {level: [] for level in levels}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (level, executor.submit(validate_seeds, level, range(chunk, min(chunk + CHUNK_SEEDS, first_seed + seeds))))
+            for level in levels
+            for chunk in range(first_seed, first_seed + seeds, CHUNK_SEEDS)
+        ]
+        for level, future in futures:
+            results[level].extend(future.result())
+    return results
+
+def print_report(results):
+    """One row per level: solvable share and means of the maze statistics"""
+    columns = ['solvable', 'path_length', 'dead_ends', 'branching']
+    print(f"{'':>10}" + ''.join(f'{column:>13}' for column in columns))
+    for level, stats in results.items():
+        solvable = [entry for entry in stats if entry['solvable']]
+        cells = [f'{len(solvable)}/{len(stats)}']
+        for column in columns[1:]:
+            cells.append(round(float(np.mean([entry[column] for entry in solvable])), 2) if solvable else '-')
+        print(f'{"level_" + str(level):>10}' + ''.join(f'{cell:>13}' for cell in cells))
+
+def parse_levels(text):
+    """'3' or '1-5' to a list of level numbers"""
+    first, _, last = text.partition('-')
+    return list(range(int(first), int(last or first) + 1))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--levels', type=parse_levels, default=parse_levels('1-5'), help='level or range of levels, e.g. 1-5')
+    parser.add_argument('--seeds', type=int, default=1000, help='seeds to check per level')
+    parser.add_argument('--first-seed', type=int, default=0, help='first seed of the range')
+    parser.add_argument('--keep', type=int, default=64, help='solvable seeds written per level')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--output', default=SEED_CATALOGUE_PATH, help='seed catalogue to write')
+    args = parser.parse_args()
+
+    results = validate_levels(args.levels, args.seeds, args.first_seed, args.workers)
+    print_report(results)
+
+    catalogue = {}
+    for level, stats in results.items():
+        width, height = MazeGenerator.level_dimensions(level)
+        catalogue[level] = {
+            'width': width,
+            'height': height,
+            'complexity': level - 1,
+            'seeds': [entry for entry in stats if entry['solvable']][:args.keep]
+        }
+    SeedCatalogue.write(args.output, catalogue)
+    print(f"Wrote {sum(len(entry['seeds']) for entry in catalogue.values())} seeds to {args.output}")
+
+if __name__ == "__main__":
+    main()